@@ -2,183 +2,186 @@
 
 from __future__ import annotations
 
+from collections import OrderedDict
+from functools import partial
 from textwrap import dedent
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import click
-from pydantic_settings import BaseSettings
-
-from pykoclaw.db import DbConnection
 from pykoclaw.plugins import PykoClawPluginBase
 
-from .config import WhatsAppSettings
+if TYPE_CHECKING:
+    import click
+    from pydantic_settings import BaseSettings
+
+    from pykoclaw.db import DbConnection
+
+    from .outbox import MessageOutbox
+
+
+_MIG_MESSAGES = dedent("""\
+    CREATE TABLE IF NOT EXISTS wa_messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        chat_jid TEXT NOT NULL,
+        sender TEXT,
+        text TEXT,
+        timestamp TEXT NOT NULL,
+        is_from_me INTEGER DEFAULT 0
+    )""")
+
+_MIG_CHATS = dedent("""\
+    CREATE TABLE IF NOT EXISTS wa_chats (
+        jid TEXT PRIMARY KEY,
+        name TEXT,
+        last_timestamp TEXT,
+        last_agent_timestamp TEXT
+    )""")
+
+_MIG_CONFIG = dedent("""\
+    CREATE TABLE IF NOT EXISTS wa_config (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )""")
+
+_MIG_ATTACHMENTS = dedent("""\
+    CREATE TABLE IF NOT EXISTS wa_attachments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        chat_jid TEXT NOT NULL,
+        message_timestamp TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        mime_type TEXT NOT NULL
+    )""")
+
+# Serve get_new_messages_for_chat: the per-chat range scan in timestamp order
+# and the attachment LEFT JOIN.
+_MIG_MESSAGES_INDEX = dedent("""\
+    CREATE INDEX IF NOT EXISTS ix_wa_messages_chat_ts
+        ON wa_messages (chat_jid, timestamp)""")
+
+_MIG_ATTACHMENTS_INDEX = dedent("""\
+    CREATE INDEX IF NOT EXISTS ix_wa_attachments_chat_ts
+        ON wa_attachments (chat_jid, message_timestamp)""")
+
+_MIGRATIONS = (
+    _MIG_MESSAGES,
+    _MIG_CHATS,
+    _MIG_CONFIG,
+    _MIG_ATTACHMENTS,
+    _MIG_MESSAGES_INDEX,
+    _MIG_ATTACHMENTS_INDEX,
+)
+
+_SEND_MESSAGE_DESCRIPTION = dedent("""\
+    Send a WhatsApp message to a chat.
+    The chat_jid is in format 'number@s.whatsapp.net' for DMs
+    or 'id@g.us' for groups.""")
 
 
 class WhatsAppPlugin(PykoClawPluginBase):
     """WhatsApp plugin for pykoclaw."""
 
     def register_commands(self, group: click.Group) -> None:
-        @group.group()
-        def whatsapp() -> None:
-            """WhatsApp integration commands."""
-
-        @whatsapp.command()
-        def auth() -> None:
-            """Authenticate with WhatsApp using QR code."""
-            from .auth import run_auth
-
-            run_auth()
-
-        @whatsapp.command()
-        def run() -> None:
-            """Run WhatsApp message listener."""
-            import logging
-            import os
-
-            from pykoclaw.config import settings
-            from pykoclaw.db import init_db
-            from pykoclaw.plugins import run_db_migrations
-
-            from .connection import WhatsAppConnection
-
-            # neonize.utils.log calls basicConfig(level=INFO) on import.
-            # Allow overriding via PYKOCLAW_LOG_LEVEL (e.g. DEBUG).
-            # We scope DEBUG to our own loggers to avoid whatsmeow/nio noise.
-            log_level = getattr(
-                logging,
-                os.getenv("PYKOCLAW_LOG_LEVEL", "INFO").upper(),
-                logging.INFO,
-            )
-            if log_level < logging.INFO:
-                for ns in (
-                    "pykoclaw",
-                    "pykoclaw_whatsapp",
-                    "pykoclaw_messaging",
-                    "claude_agent_sdk",
-                ):
-                    logging.getLogger(ns).setLevel(log_level)
-            else:
-                logging.getLogger().setLevel(log_level)
-
-            db = init_db(settings.db_path)
-            db.execute("PRAGMA journal_mode=WAL")
-
-            plugin = WhatsAppPlugin()
-            run_db_migrations(db, [plugin])
-
-            mcp_servers = plugin.get_mcp_servers(db, "whatsapp")
-
-            from .config import get_config
-            from .routing import load_routing_config
-
-            wa_config = get_config()
-            routing = load_routing_config(
-                wa_config.agent_routes, wa_config.trigger_name
-            )
+        from .cli import whatsapp
 
-            click.echo(f"Data directory: {settings.data}")
-            click.echo(f"Agents:         {', '.join(routing.agents)}")
-            click.echo(f"Group routes:   {len(routing.routes)}")
-            for jid, names in routing.routes.items():
-                click.echo(f"  {jid} → {', '.join(names)}")
-
-            conn = WhatsAppConnection(
-                db=db, extra_mcp_servers=mcp_servers, routing=routing
-            )
-            conn.run()
-
-        @whatsapp.command()
-        def status() -> None:
-            """Check WhatsApp connection status."""
-            click.echo("WhatsApp status check not yet implemented")
+        group.add_command(whatsapp)
 
     def get_db_migrations(self) -> list[str]:
-        return [
-            dedent("""\
-                CREATE TABLE IF NOT EXISTS wa_messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    chat_jid TEXT NOT NULL,
-                    sender TEXT,
-                    text TEXT,
-                    timestamp TEXT NOT NULL,
-                    is_from_me INTEGER DEFAULT 0
-                )"""),
-            dedent("""\
-                CREATE TABLE IF NOT EXISTS wa_chats (
-                    jid TEXT PRIMARY KEY,
-                    name TEXT,
-                    last_timestamp TEXT,
-                    last_agent_timestamp TEXT
-                )"""),
-            dedent("""\
-                CREATE TABLE IF NOT EXISTS wa_config (
-                    key TEXT PRIMARY KEY,
-                    value TEXT
-                )"""),
-            dedent("""\
-                CREATE TABLE IF NOT EXISTS wa_attachments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    chat_jid TEXT NOT NULL,
-                    message_timestamp TEXT NOT NULL,
-                    file_path TEXT NOT NULL,
-                    mime_type TEXT NOT NULL
-                )"""),
-        ]
+        return list(_MIGRATIONS)
 
     def get_config_class(self) -> type[BaseSettings] | None:
+        from .config import WhatsAppSettings
+
         return WhatsAppSettings
 
     def get_mcp_servers(self, db: DbConnection, conversation: str) -> dict[str, Any]:
+        key = (db, conversation)
+        if key in _MCP_CACHE:
+            return _MCP_CACHE[key]
+
         from claude_agent_sdk import create_sdk_mcp_server, tool
 
         from pykoclaw_vision import make_analyze_image_tool
-        from .handler import format_xml_messages, get_new_messages_for_chat
 
-        @tool(
+        send_message = tool(
             "send_message",
-            dedent("""\
-                Send a WhatsApp message to a chat.
-                The chat_jid is in format 'number@s.whatsapp.net' for DMs
-                or 'id@g.us' for groups."""),
+            _SEND_MESSAGE_DESCRIPTION,
             {"chat_jid": str, "text": str},
-        )
-        async def send_message(args: dict[str, Any]) -> dict[str, Any]:
-            chat_jid = args["chat_jid"]
-            text = args["text"]
-            db.execute(
-                dedent("""\
-                    INSERT INTO wa_messages
-                        (chat_jid, sender, text, timestamp, is_from_me)
-                    VALUES (?, ?, ?, datetime('now'), 1)"""),
-                (chat_jid, "assistant", text),
-            )
-            db.commit()
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": f"Message queued for {chat_jid} ({len(text)} chars)",
-                    }
-                ]
-            }
-
-        @tool(
+        )(partial(_send_message, db))
+        get_chat_history = tool(
             "get_chat_history",
             "Get recent messages from a WhatsApp chat.",
             {"chat_jid": str},
-        )
-        async def get_chat_history(args: dict[str, Any]) -> dict[str, Any]:
-            messages = get_new_messages_for_chat(db, args["chat_jid"])
-            if not messages:
-                return {"content": [{"type": "text", "text": "No new messages."}]}
-            xml = format_xml_messages(messages)
-            return {"content": [{"type": "text", "text": xml}]}
-
+        )(partial(_get_chat_history, db))
         analyze_image = make_analyze_image_tool()
 
-        return {
+        servers = {
             "whatsapp": create_sdk_mcp_server(
                 name="whatsapp",
                 tools=[send_message, get_chat_history, analyze_image],
             )
         }
+        _MCP_CACHE[key] = servers
+        return servers
+
+
+# MCP servers built by ``get_mcp_servers``, keyed by ``(db, conversation)``.
+_MCP_CACHE: dict[tuple[DbConnection, str], dict[str, Any]] = {}
+
+_OUTBOXES: dict[DbConnection, MessageOutbox] = {}
+
+# Last ``get_chat_history`` result per chat, keyed by message count and the
+# newest message so repeated polls with nothing new skip re-formatting.  One
+# entry per chat, replaced in place; the least recently used is evicted past
+# ``_HISTORY_XML_MAX`` entries.
+_HISTORY_XML: OrderedDict[
+    tuple[DbConnection, str], tuple[tuple[int, tuple[Any, ...]], str]
+] = OrderedDict()
+_HISTORY_XML_MAX = 128
+
+
+def _get_outbox(db: DbConnection) -> MessageOutbox:
+    if db not in _OUTBOXES:
+        from .outbox import MessageOutbox
+
+        _OUTBOXES[db] = MessageOutbox(db)
+    return _OUTBOXES[db]
+
+
+def flush_outboxes() -> None:
+    """Write every message still buffered by ``send_message`` tool calls."""
+    for outbox in _OUTBOXES.values():
+        outbox.flush()
+
+
+_ACK_TEMPLATE = "Message queued for %s (%d chars)"
+
+
+def _text_result(text: str) -> dict[str, Any]:
+    """Wrap *text* in the MCP tool result shape."""
+    return {"content": [{"type": "text", "text": text}]}
+
+
+async def _send_message(db: DbConnection, args: dict[str, Any]) -> dict[str, Any]:
+    chat_jid = args["chat_jid"]
+    text = args["text"]
+    _get_outbox(db).put(chat_jid, text)
+    return _text_result(_ACK_TEMPLATE % (chat_jid, len(text)))
+
+
+async def _get_chat_history(db: DbConnection, args: dict[str, Any]) -> dict[str, Any]:
+    from .handler import format_xml_messages, get_new_messages_for_chat
+
+    chat_jid = args["chat_jid"]
+    messages = get_new_messages_for_chat(db, chat_jid)
+    if not messages:
+        return _text_result("No new messages.")
+    key = (len(messages), messages[-1])
+    cached = _HISTORY_XML.get((db, chat_jid))
+    if cached is not None and cached[0] == key:
+        _HISTORY_XML.move_to_end((db, chat_jid))
+        return _text_result(cached[1])
+    xml = format_xml_messages(messages)
+    _HISTORY_XML[db, chat_jid] = (key, xml)
+    _HISTORY_XML.move_to_end((db, chat_jid))
+    if len(_HISTORY_XML) > _HISTORY_XML_MAX:
+        _HISTORY_XML.popitem(last=False)
+    return _text_result(xml)
@@ -0,0 +1,43 @@
+"""``WhatsAppSettings`` model, imported lazily by :mod:`.config`."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class WhatsAppSettings(BaseSettings):
+    """WhatsApp plugin configuration."""
+
+    auth_dir: Path = Field(
+        default_factory=lambda: (
+            Path.home() / ".local" / "share" / "pykoclaw" / "whatsapp" / "auth"
+        )
+    )
+    trigger_name: str = Field(default="Andy")
+    session_db: Path = Field(
+        default_factory=lambda: (
+            Path.home() / ".local" / "share" / "pykoclaw" / "whatsapp" / "session.db"
+        )
+    )
+    batch_window_seconds: int = Field(default=90)
+    batch_max_messages: int = Field(
+        default=0,
+        description="Flush a batch early after this many messages (0 = off).",
+    )
+    agent_routes: Path | None = Field(
+        default=None,
+        description="Path to agent routing JSON file for multi-agent groups.",
+    )
+
+    model_config = {
+        "env_prefix": "PYKOCLAW_WA_",
+        "env_file": (
+            str(Path.home() / ".local" / "share" / "pykoclaw" / ".env"),
+            ".env",
+        ),
+        "env_file_encoding": "utf-8",
+        "extra": "ignore",
+    }
@@ -0,0 +1,62 @@
+"""Report the slowest imports triggered by importing a module.
+
+Run ``python -m pykoclaw_whatsapp._startup_profile [module] [count]`` to see
+the heaviest entries of ``python -X importtime -c "import <module>"``, sorted
+by cumulative time.  Use it to decide which imports to defer next.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from dataclasses import dataclass
+
+
+@dataclass
+class ImportTiming:
+    """One line of ``-X importtime`` output (times in microseconds)."""
+
+    self_us: int
+    cumulative_us: int
+    module: str
+
+
+def parse_importtime(stderr: str) -> list[ImportTiming]:
+    """Parse ``-X importtime`` stderr into :class:`ImportTiming` entries."""
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3:
+            continue
+        self_us, cumulative_us, module = fields
+        if not self_us.strip().isdigit():
+            continue  # header line
+        timings.append(ImportTiming(int(self_us), int(cumulative_us), module.strip()))
+    return timings
+
+
+def profile_import(module: str) -> list[ImportTiming]:
+    """Import *module* in a fresh interpreter and return its import timings."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return parse_importtime(result.stderr)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = sys.argv[1:] if argv is None else argv
+    module = args[0] if args else "pykoclaw_whatsapp"
+    count = int(args[1]) if len(args) > 1 else 20
+    timings = sorted(profile_import(module), key=lambda t: -t.cumulative_us)
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for timing in timings[:count]:
+        print(f"{timing.cumulative_us:>10}us {timing.self_us:>8}us  {timing.module}")
+
+
+if __name__ == "__main__":
+    main()
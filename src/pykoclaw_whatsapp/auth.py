@@ -11,6 +11,10 @@ from neonize.client import NewClient
 from neonize.events import ConnectedEv
 
 from .config import get_config
+from .sqlite_tuning import tune_session_db
+
+# Reused across QR refreshes instead of building a new renderer per event.
+_QR = qrcode.QRCode()
 
 
 def run_auth() -> None:
@@ -20,6 +24,7 @@ def run_auth() -> None:
 
     click.echo("Starting WhatsApp authentication...\n")
 
+    tune_session_db(config.session_db)
     client = NewClient(str(config.session_db))
 
     qr_displayed = False
@@ -35,10 +40,10 @@ def run_auth() -> None:
             click.echo("  3. Point your camera at the QR code below\n")
             qr_displayed = True
 
-        qr = qrcode.QRCode()
-        qr.add_data(data_qr)
-        qr.make()
-        qr.print_ascii()
+        _QR.clear()
+        _QR.add_data(data_qr)
+        _QR.make(fit=True)
+        _QR.print_ascii()
 
     @client.event(ConnectedEv)
     def on_connected(_client: NewClient, event: ConnectedEv) -> None:
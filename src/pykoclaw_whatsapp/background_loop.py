@@ -0,0 +1,36 @@
+"""Process-wide asyncio loop running on a daemon thread.
+
+neonize delivers events on Go threads, so coroutines are handed to this loop
+with :func:`submit`.  Sharing one loop per process lets long-lived clients and
+tasks be reused instead of each component spinning up its own thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Coroutine
+from concurrent.futures import Future
+from typing import Any
+
+_lock = threading.Lock()
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared loop, starting its thread on first use."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="pykoclaw-wa-loop", daemon=True
+            )
+            thread.start()
+            _loop = loop
+        return _loop
+
+
+def submit[T](coro: Coroutine[Any, Any, T]) -> Future[T]:
+    """Schedule *coro* on the shared loop from any thread."""
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop())
@@ -0,0 +1,54 @@
+"""Lazily-loaded ``pykoclaw whatsapp`` command group.
+
+Subcommands are registered as ``"module:attribute"`` import strings and only
+imported when Click resolves them, so building the CLI (e.g. for
+``pykoclaw --help``) does not import the command modules at all.
+"""
+
+from __future__ import annotations
+
+import importlib
+
+import click
+
+
+class LazyGroup(click.Group):
+    """A :class:`click.Group` whose subcommands are imported on demand."""
+
+    def __init__(
+        self,
+        *args: object,
+        lazy_subcommands: dict[str, str] | None = None,
+        **kwargs: object,
+    ) -> None:
+        super().__init__(*args, **kwargs)  # type: ignore[arg-type]
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted({*super().list_commands(ctx), *self.lazy_subcommands})
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name in self.lazy_subcommands:
+            return self._load_command(cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def _load_command(self, cmd_name: str) -> click.Command:
+        module_name, attr = self.lazy_subcommands[cmd_name].split(":", 1)
+        command = getattr(importlib.import_module(module_name), attr)
+        if not isinstance(command, click.Command):
+            raise TypeError(
+                f"Lazy subcommand {cmd_name!r} resolved to {command!r}, "
+                "not a click.Command"
+            )
+        return command
+
+
+whatsapp = LazyGroup(
+    name="whatsapp",
+    help="WhatsApp integration commands.",
+    lazy_subcommands={
+        "auth": "pykoclaw_whatsapp.cmd_auth:auth",
+        "run": "pykoclaw_whatsapp.cmd_run:run",
+        "status": "pykoclaw_whatsapp.cmd_status:status",
+    },
+)
@@ -0,0 +1,13 @@
+"""``pykoclaw whatsapp auth`` command."""
+
+from __future__ import annotations
+
+import click
+
+
+@click.command()
+def auth() -> None:
+    """Authenticate with WhatsApp using QR code."""
+    from .auth import run_auth
+
+    run_auth()
@@ -0,0 +1,61 @@
+"""``pykoclaw whatsapp run`` command."""
+
+from __future__ import annotations
+
+import click
+
+
+@click.command()
+def run() -> None:
+    """Run WhatsApp message listener."""
+    import logging
+    import os
+
+    from pykoclaw.config import settings
+    from pykoclaw.db import init_db
+    from pykoclaw.plugins import run_db_migrations
+
+    from . import WhatsAppPlugin
+    from .config import get_config
+    from .connection import WhatsAppConnection
+    from .routing import load_routing_config
+    from .sqlite_tuning import tune_bridge_db
+
+    # neonize.utils.log calls basicConfig(level=INFO) on import.
+    # Allow overriding via PYKOCLAW_LOG_LEVEL (e.g. DEBUG).
+    # We scope DEBUG to our own loggers to avoid whatsmeow/nio noise.
+    log_level = getattr(
+        logging,
+        os.getenv("PYKOCLAW_LOG_LEVEL", "INFO").upper(),
+        logging.INFO,
+    )
+    if log_level < logging.INFO:
+        for ns in (
+            "pykoclaw",
+            "pykoclaw_whatsapp",
+            "pykoclaw_messaging",
+            "claude_agent_sdk",
+        ):
+            logging.getLogger(ns).setLevel(log_level)
+    else:
+        logging.getLogger().setLevel(log_level)
+
+    db = init_db(settings.db_path)
+    tune_bridge_db(db)
+
+    plugin = WhatsAppPlugin()
+    run_db_migrations(db, [plugin])
+
+    mcp_servers = plugin.get_mcp_servers(db, "whatsapp")
+
+    wa_config = get_config()
+    routing = load_routing_config(wa_config.agent_routes, wa_config.trigger_name)
+
+    click.echo(f"Data directory: {settings.data}")
+    click.echo(f"Agents:         {', '.join(routing.agents)}")
+    click.echo(f"Group routes:   {len(routing.routes)}")
+    for jid, names in routing.routes.items():
+        click.echo(f"  {jid} → {', '.join(names)}")
+
+    conn = WhatsAppConnection(db=db, extra_mcp_servers=mcp_servers, routing=routing)
+    conn.run()
@@ -0,0 +1,11 @@
+"""``pykoclaw whatsapp status`` command."""
+
+from __future__ import annotations
+
+import click
+
+
+@click.command()
+def status() -> None:
+    """Check WhatsApp connection status."""
+    click.echo("WhatsApp status check not yet implemented")
@@ -1,51 +1,33 @@
-"""WhatsApp plugin configuration."""
+"""WhatsApp plugin configuration.
 
-from __future__ import annotations
+``WhatsAppSettings`` lives in :mod:`._settings` and is imported on first
+access (PEP 562 module ``__getattr__``) so that importing this module — e.g.
+for ``pykoclaw whatsapp --help`` — does not pull in pydantic.
+"""
 
-from pathlib import Path
+from __future__ import annotations
 
-from pydantic import Field
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
 
+if TYPE_CHECKING:
+    from ._settings import WhatsAppSettings
 
-class WhatsAppSettings(BaseSettings):
-    """WhatsApp plugin configuration."""
 
-    auth_dir: Path = Field(
-        default=Path.home() / ".local" / "share" / "pykoclaw" / "whatsapp" / "auth"
-    )
-    trigger_name: str = Field(default="Andy")
-    session_db: Path = Field(
-        default=Path.home()
-        / ".local"
-        / "share"
-        / "pykoclaw"
-        / "whatsapp"
-        / "session.db"
-    )
-    batch_window_seconds: int = Field(default=90)
-    agent_routes: Path | None = Field(
-        default=None,
-        description="Path to agent routing JSON file for multi-agent groups.",
-    )
+def __getattr__(name: str) -> Any:
+    if name == "WhatsAppSettings":
+        from ._settings import WhatsAppSettings
 
-    model_config = {
-        "env_prefix": "PYKOCLAW_WA_",
-        "env_file": (
-            str(Path.home() / ".local" / "share" / "pykoclaw" / ".env"),
-            ".env",
-        ),
-        "env_file_encoding": "utf-8",
-        "extra": "ignore",
-    }
+        return WhatsAppSettings
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-_config: WhatsAppSettings | None = None
+@lru_cache(maxsize=1)
+def get_config() -> WhatsAppSettings:
+    """Get WhatsApp plugin configuration.
 
+    The instance is cached; call ``get_config.cache_clear()`` to reload.
+    """
+    from ._settings import WhatsAppSettings
 
-def get_config() -> WhatsAppSettings:
-    """Get WhatsApp plugin configuration."""
-    global _config
-    if _config is None:
-        _config = WhatsAppSettings()
-    return _config
+    return WhatsAppSettings()
@@ -11,18 +11,19 @@ prefixing and loop prevention.
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import logging
-import re
 import signal
-import threading
+import time
+from functools import lru_cache
 from pathlib import Path
 from textwrap import dedent
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from neonize.client import NewClient
 from neonize.events import ConnectedEv, DisconnectedEv, MessageEv, QREv
 from neonize.utils.enum import ChatPresence, ChatPresenceMedia
-from neonize.utils.jid import Jid2String
+from neonize.utils.jid import Jid2String, build_jid
 
 from pykoclaw.config import settings as core_settings
 from pykoclaw.db import (
@@ -34,6 +35,8 @@ from pykoclaw.db import (
 )
 from pykoclaw_messaging import dispatch_to_agent
 
+from . import flush_outboxes
+from .background_loop import get_background_loop, submit
 from .config import WhatsAppSettings, get_config
 from .formatting import markdown_to_whatsapp
 from .handler import (
@@ -47,9 +50,26 @@ from .handler import (
 from .queue import OutgoingQueue
 from .routing import AgentConfig, RoutingConfig, load_routing_config
 from .segments import ImageSegment, TextSegment, split_segments
+from .sqlite_tuning import tune_bridge_db, tune_session_db, write_lock
+
+if TYPE_CHECKING:
+    from neonize.proto.Neonize_pb2 import JID
 
 log = logging.getLogger(__name__)
 
+_REPLY_OPEN = "<reply>"
+_REPLY_CLOSE = "</reply>"
+
+
+@lru_cache(maxsize=1024)
+def _cached_build_jid(chat_jid_str: str) -> JID:
+    """Build and memoize a JID per chat string.
+
+    The returned JID is shared between callers and must not be mutated.
+    """
+    user, sep, server = chat_jid_str.partition("@")
+    return build_jid(user, server) if sep else build_jid(user)
+
 
 def _extract_reply(text: str) -> str | None:
     """Extract text wrapped in <reply> tags from agent output.
@@ -63,10 +83,86 @@ def _extract_reply(text: str) -> str | None:
     Returns:
         Joined non-empty reply content, or None if no valid replies found.
     """
-    matches = re.findall(r"<reply>(.*?)</reply>", text, re.DOTALL)
-    stripped = [m.strip() for m in matches]
-    filtered = [m for m in stripped if m]
-    return "\n".join(filtered) if filtered else None
+    parts = []
+    pos = 0
+    while (start := text.find(_REPLY_OPEN, pos)) >= 0:
+        start += len(_REPLY_OPEN)
+        end = text.find(_REPLY_CLOSE, start)
+        if end < 0:
+            break
+        if segment := text[start:end].strip():
+            parts.append(segment)
+        pos = end + len(_REPLY_CLOSE)
+    return "\n".join(parts) if parts else None
+
+
+_HARD_MENTION_INSTRUCTION = (
+    "IMPORTANT: You are being directly addressed! "
+    "You MUST reply and your reply MUST be wrapped in <reply> tags. "
+    "Example: <reply>Hello, I can help with that!</reply> "
+    "If you cannot fulfill the request, still reply with an explanation inside <reply> tags. "
+    "Do NOT reply outside of <reply> tags — such replies will be ignored.\n\n"
+)
+_AMBIENT_INSTRUCTION = "Decide whether to reply, use tools silently, or do nothing."
+
+
+@lru_cache(maxsize=256)
+def _system_prompt_for(
+    agent_name: str, chat_jid: str, other_agent_names: tuple[str, ...]
+) -> str:
+    """Build the system prompt for an agent in a chat.
+
+    Cached because it depends only on its arguments; *other_agent_names* is
+    empty unless the chat is a multi-agent group.
+    """
+    base = dedent(
+        f"""\
+        You are {agent_name}, an ambient participant in a WhatsApp chat ({chat_jid}).
+
+        When you choose to reply, wrap your ENTIRE reply in `<reply>` tags. Text \
+        outside these tags will NOT be delivered to the chat. Tool-call reasoning \
+        and internal notes must NOT be wrapped in `<reply>` tags.
+
+        When directly addressed by name or @mention (e.g. "Tyko, can you..." or \
+        "@Tyko help"), you MUST reply — acknowledge the request and respond. \
+        Even if you can't fulfill the request, explain why.
+        When NOT directly addressed, you may stay silent and observe, or reply \
+        only if there's clear factual misinformation or crucial knowledge you have.
+        Do NOT volunteer opinions, make small talk, or interject with tangential \
+        information. If you choose not to reply, produce no text output at all — \
+        do not explain why you are staying silent.
+        You may use tools silently (e.g., writing notes, updating files) even \
+        when you choose not to reply. Tool use without a reply is normal and expected.
+        People may refer to you by name in various forms — your full name, \
+        shortened, with or without @, with punctuation, or even inflected/declined \
+        forms in non-English languages. When someone addresses you by any variation \
+        of your name, treat it as a direct address and reply.
+
+        When a message contains an <attachment type="image" path="..." /> element, \
+        use the analyze_image tool with that path to examine the image before replying. \
+        Image-only messages (no caption text) are valid — call analyze_image even \
+        when there is no accompanying text.
+
+        To send an image directly as a WhatsApp attachment, place its absolute \
+        file path on its own line inside <reply> tags — the bridge reads the file \
+        and delivers it as an image message automatically. Prefer this over the \
+        httpd skill when the goal is simply to share an image with the chat."""
+    )
+    if other_agent_names:
+        others = ", ".join(other_agent_names)
+        base += dedent(
+            f"""
+
+            This is a multi-agent group. Other AI agents in this chat: {others}.
+            Messages prefixed with [AgentName]: are from another AI agent.
+            Do NOT respond to another agent's messages — even if they address you.
+            Only after a human participant sends a message should you consider
+            whether to speak. Never engage in agent-to-agent dialogue."""
+        )
+    # NOTE: hard_mention instruction goes in the user prompt, not here.
+    # system_prompt is baked into the session at creation and silently
+    # ignored on resume — see .memory/session-resume-system-prompt.md.
+    return base
 
 
 class WhatsAppConnection:
@@ -80,6 +176,9 @@ class WhatsAppConnection:
     """
 
     DELIVERY_POLL_INTERVAL_S = 10
+    DELIVERY_POLL_MAX_INTERVAL_S = 60
+    PRESENCE_DEBOUNCE_S = 3
+    PRESENCE_REFRESH_S = 10
 
     def __init__(
         self,
@@ -98,10 +197,15 @@ class WhatsAppConnection:
         self._handler: MessageHandler | None = None
         self._batch_accumulator: BatchAccumulator | None = None
         self._delivery_task: asyncio.Task[None] | None = None
+        self._delivery_wakeup = asyncio.Event()
         self._routing = routing or load_routing_config(
             self._config.agent_routes, self._config.trigger_name
         )
         self._agent_dbs: dict[str, DbConnection] = {}
+        self._composing: dict[str, int] = {}
+        self._presence_state: dict[str, tuple[bool, float]] = {}
+        self._presence_refresh: dict[str, asyncio.Task[None]] = {}
+        self._delivery_dbs: list[DbConnection] | None = None
 
     def _get_agent_db(self, agent: AgentConfig) -> DbConnection:
         """Get or lazily create a DB connection for an agent's data directory.
@@ -114,8 +218,9 @@ class WhatsAppConnection:
         if agent.name not in self._agent_dbs:
             db_path = agent.data_dir / "pykoclaw.db"
             db = init_db(db_path)
-            db.execute("PRAGMA journal_mode=WAL")
+            tune_bridge_db(db)
             self._agent_dbs[agent.name] = db
+            self._delivery_dbs = None
             log.info("Opened agent DB: %s → %s", agent.name, db_path)
         return self._agent_dbs[agent.name]
 
@@ -127,15 +232,46 @@ class WhatsAppConnection:
         """Block the main thread on neonize ``connect()`` until Ctrl-C.
 
         ``connect()`` is a blocking ctypes→Go call that only unblocks when
-        ``client.stop()`` cancels the Go context.  The asyncio loop runs on
-        a daemon thread so ``run_coroutine_threadsafe`` agent callbacks work.
+        ``client.stop()`` cancels the Go context.  Agent callbacks run on the
+        process-wide background loop (see :mod:`.background_loop`).
         """
-        self._loop = asyncio.new_event_loop()
+        self._ensure_runtime()
+
+        self._config.auth_dir.mkdir(parents=True, exist_ok=True)
+        tune_session_db(self._config.session_db)
+        self._client = NewClient(str(self._config.session_db))
+
+        self._register_events(self._client)
+
+        log.info("Starting WhatsApp connection...")
+        log.info(
+            "Routing: %d agents (%s), %d group routes",
+            len(self._routing.agents),
+            ", ".join(self._routing.agents),
+            len(self._routing.routes),
+        )
+
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            self._client.connect()
+        finally:
+            submit(self._shutdown()).result()
+
+    def _ensure_runtime(self) -> None:
+        """Create the loop, batch accumulator and message handler once.
+
+        Calling :meth:`run` again (e.g. after a logout) reuses them, so
+        messages still batching from the previous session are not dropped.
+        """
+        if self._handler is not None:
+            return
+        self._loop = get_background_loop()
 
         self._batch_accumulator = BatchAccumulator(
             window_seconds=self._config.batch_window_seconds,
             loop=self._loop,
             flush_callback=self._handle_agent_trigger,
+            max_messages=self._config.batch_max_messages,
         )
 
         self._handler = MessageHandler(
@@ -148,24 +284,32 @@ class WhatsAppConnection:
             agent_callback=self._handle_agent_trigger,
         )
 
-        loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
-        loop_thread.start()
+    async def _shutdown(self) -> None:
+        """Stop delivery polling, flush buffered tool messages, close agent DBs.
 
-        self._config.auth_dir.mkdir(parents=True, exist_ok=True)
-        self._client = NewClient(str(self._config.session_db))
-
-        self._register_events(self._client)
-
-        log.info("Starting WhatsApp connection...")
-        log.info(
-            "Routing: %d agents (%s), %d group routes",
-            len(self._routing.agents),
-            ", ".join(self._routing.agents),
-            len(self._routing.routes),
-        )
-
-        signal.signal(signal.SIGINT, signal.SIG_DFL)
-        self._client.connect()
+        Runs on the background loop thread, where per-agent DBs are used.
+        """
+        task, self._delivery_task = self._delivery_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        flush_outboxes()
+        self.close_agent_dbs()
+
+    def close_agent_dbs(self) -> None:
+        """Close every per-agent DB opened by :meth:`_get_agent_db`.
+
+        Call this on the background loop thread with delivery polling stopped
+        (see :meth:`_shutdown`), or a poll would simply reopen them.
+        """
+        self._delivery_dbs = None
+        while self._agent_dbs:
+            name, db = self._agent_dbs.popitem()
+            try:
+                db.close()
+            except Exception:
+                log.exception("Failed to close agent DB: %s", name)
 
     def _register_events(self, client: NewClient) -> None:
         @client.event(QREv)
@@ -188,9 +332,7 @@ class WhatsAppConnection:
             self._outgoing_queue.flush(_client)
 
             if self._loop and self._delivery_task is None:
-                asyncio.run_coroutine_threadsafe(
-                    self._start_delivery_polling(), self._loop
-                )
+                submit(self._start_delivery_polling())
 
         @client.event(DisconnectedEv)
         def on_disconnected(_client: NewClient, event: DisconnectedEv) -> None:
@@ -213,72 +355,32 @@ class WhatsAppConnection:
         is_multi_agent: bool,
         other_agent_names: list[str] | None = None,
     ) -> str:
-        trigger = agent.name
-        base = dedent(
-            f"""\
-            You are {trigger}, an ambient participant in a WhatsApp chat ({chat_jid}).
-
-            When you choose to reply, wrap your ENTIRE reply in `<reply>` tags. Text \
-            outside these tags will NOT be delivered to the chat. Tool-call reasoning \
-            and internal notes must NOT be wrapped in `<reply>` tags.
-
-            When directly addressed by name or @mention (e.g. "Tyko, can you..." or \
-            "@Tyko help"), you MUST reply — acknowledge the request and respond. \
-            Even if you can't fulfill the request, explain why.
-            When NOT directly addressed, you may stay silent and observe, or reply \
-            only if there's clear factual misinformation or crucial knowledge you have.
-            Do NOT volunteer opinions, make small talk, or interject with tangential \
-            information. If you choose not to reply, produce no text output at all — \
-            do not explain why you are staying silent.
-            You may use tools silently (e.g., writing notes, updating files) even \
-            when you choose not to reply. Tool use without a reply is normal and expected.
-            People may refer to you by name in various forms — your full name, \
-            shortened, with or without @, with punctuation, or even inflected/declined \
-            forms in non-English languages. When someone addresses you by any variation \
-            of your name, treat it as a direct address and reply.
-
-            When a message contains an <attachment type="image" path="..." /> element, \
-            use the analyze_image tool with that path to examine the image before replying. \
-            Image-only messages (no caption text) are valid — call analyze_image even \
-            when there is no accompanying text.
-
-            To send an image directly as a WhatsApp attachment, place its absolute \
-            file path on its own line inside <reply> tags — the bridge reads the file \
-            and delivers it as an image message automatically. Prefer this over the \
-            httpd skill when the goal is simply to share an image with the chat."""
-        )
-        if is_multi_agent and other_agent_names:
-            others = ", ".join(other_agent_names)
-            base += dedent(
-                f"""
-
-                This is a multi-agent group. Other AI agents in this chat: {others}.
-                Messages prefixed with [AgentName]: are from another AI agent.
-                Do NOT respond to another agent's messages — even if they address you.
-                Only after a human participant sends a message should you consider
-                whether to speak. Never engage in agent-to-agent dialogue."""
-            )
-        # NOTE: hard_mention instruction goes in the user prompt, not here.
-        # system_prompt is baked into the session at creation and silently
-        # ignored on resume — see .memory/session-resume-system-prompt.md.
-        return base
+        others = tuple(other_agent_names or ()) if is_multi_agent else ()
+        return _system_prompt_for(agent.name, chat_jid, others)
 
     async def _handle_agent_trigger(
         self,
         chat_jid: str,
         hard_mention: bool = False,
     ) -> None:
-        """Handle a batch flush by dispatching to all mapped agents sequentially."""
+        """Handle a batch flush by dispatching to all mapped agents concurrently."""
         agents = self._routing.agents_for_chat(chat_jid)
+        if not agents:
+            return
         is_multi = len(agents) > 1
 
         messages = get_new_messages_for_chat(self._db, chat_jid)
         if not messages:
             return
 
-        # Determine which agents are specifically hard-mentioned in the batch
-        all_text = " ".join(text for _, _, text, _ in messages if text)
-        mentioned_agents = find_hard_mentions(all_text, self._routing.all_trigger_names)
+        # Determine which agents are specifically hard-mentioned in the batch.
+        # Each message is scanned on its own, matching MessageHandler's
+        # per-message check, so no joined copy of the batch is built.
+        trigger_names = self._routing.all_trigger_names
+        mentioned_agents: set[str] = set()
+        for _, _, text, _ in messages:
+            if text:
+                mentioned_agents |= find_hard_mentions(text, trigger_names)
 
         log.debug(
             "Trigger for %s: hard_mention=%s, messages=%d, mentioned=%s",
@@ -288,6 +390,7 @@ class WhatsAppConnection:
             mentioned_agents or "(none — any agent may respond)",
         )
 
+        dispatches = []
         for agent in agents:
             agent_hard_mention = hard_mention and (
                 not mentioned_agents or agent.name in mentioned_agents
@@ -295,17 +398,23 @@ class WhatsAppConnection:
             log.debug(
                 "  → agent=%s agent_hard_mention=%s", agent.name, agent_hard_mention
             )
-            try:
-                await self._dispatch_for_agent(
+            dispatches.append(
+                self._dispatch_for_agent(
                     chat_jid=chat_jid,
                     agent=agent,
                     messages=messages,
                     is_multi_agent=is_multi,
                     hard_mention=agent_hard_mention,
                 )
-            except Exception:
-                log.exception(
-                    "Error in agent trigger for %s (agent=%s)", chat_jid, agent.name
+            )
+        results = await asyncio.gather(*dispatches, return_exceptions=True)
+        for agent, outcome in zip(agents, results):
+            if isinstance(outcome, Exception):
+                log.error(
+                    "Error in agent trigger for %s (agent=%s)",
+                    chat_jid,
+                    agent.name,
+                    exc_info=outcome,
                 )
 
         # Advance cursor after all agents have processed
@@ -313,6 +422,9 @@ class WhatsAppConnection:
         if last_msg_ts:
             update_agent_cursor(self._db, chat_jid, last_msg_ts)
 
+        # Agent runs may have queued deliveries; pick them up right away.
+        self._delivery_wakeup.set()
+
     async def _dispatch_for_agent(
         self,
         *,
@@ -337,23 +449,18 @@ class WhatsAppConnection:
             other_agent_names=other_names if is_multi_agent else None,
         )
 
-        prompt = f"New message batch from WhatsApp chat:\n\n{xml_context}\n\n"
-        if hard_mention:
-            prompt += (
-                "IMPORTANT: You are being directly addressed! "
-                "You MUST reply and your reply MUST be wrapped in <reply> tags. "
-                "Example: <reply>Hello, I can help with that!</reply> "
-                "If you cannot fulfill the request, still reply with an explanation inside <reply> tags. "
-                "Do NOT reply outside of <reply> tags — such replies will be ignored.\n\n"
-            )
-        else:
-            prompt += "Decide whether to reply, use tools silently, or do nothing."
+        instruction = (
+            _HARD_MENTION_INSTRUCTION if hard_mention else _AMBIENT_INSTRUCTION
+        )
+        prompt = (
+            f"New message batch from WhatsApp chat:\n\n{xml_context}\n\n{instruction}"
+        )
 
         agent_db = self._get_agent_db(agent)
         agent_data_dir = self._get_agent_data_dir(agent)
 
         # Show "Writing..." indicator while the agent is thinking.
-        self._set_chat_presence(chat_jid, composing=True)
+        self._begin_composing(chat_jid)
         try:
             result = await dispatch_to_agent(
                 prompt=prompt,
@@ -367,7 +474,7 @@ class WhatsAppConnection:
                 include_partial_messages=False,
             )
         finally:
-            self._set_chat_presence(chat_jid, composing=False)
+            self._end_composing(chat_jid)
 
         # When hard-mentioned, an empty result means the Claude subprocess exited
         # before processing the request (exit code 0, no text written).  Retry
@@ -378,7 +485,7 @@ class WhatsAppConnection:
                 agent.name,
                 chat_jid,
             )
-            self._set_chat_presence(chat_jid, composing=True)
+            self._begin_composing(chat_jid)
             try:
                 result = await dispatch_to_agent(
                     prompt=prompt,
@@ -393,7 +500,7 @@ class WhatsAppConnection:
                     include_partial_messages=False,
                 )
             finally:
-                self._set_chat_presence(chat_jid, composing=False)
+                self._end_composing(chat_jid)
 
         log.info(
             "Agent %s dispatch done (hard_mention=%s, full_text=%r)",
@@ -416,22 +523,44 @@ class WhatsAppConnection:
         self._delivery_task = asyncio.create_task(self._delivery_poll_loop())
 
     async def _delivery_poll_loop(self) -> None:
+        """Poll for deliveries, backing off while the queues stay empty.
+
+        The interval doubles after each empty poll up to
+        ``DELIVERY_POLL_MAX_INTERVAL_S`` and resets after a poll that found
+        work or a ``_delivery_wakeup`` set after an agent run.
+        """
         log.info("Delivery polling started")
+        interval = self.DELIVERY_POLL_INTERVAL_S
         try:
             while True:
-                await asyncio.sleep(self.DELIVERY_POLL_INTERVAL_S)
                 try:
-                    self._process_pending_deliveries()
+                    await asyncio.wait_for(
+                        self._delivery_wakeup.wait(), timeout=interval
+                    )
+                    woken = True
+                except TimeoutError:
+                    woken = False
+                self._delivery_wakeup.clear()
+                processed = 0
+                try:
+                    processed = self._process_pending_deliveries()
                 except Exception:
                     log.exception("Error processing delivery queue")
+                if processed or woken:
+                    interval = self.DELIVERY_POLL_INTERVAL_S
+                else:
+                    interval = min(interval * 2, self.DELIVERY_POLL_MAX_INTERVAL_S)
         except asyncio.CancelledError:
             log.info("Delivery polling stopped")
 
     def _get_all_delivery_dbs(self) -> list[DbConnection]:
         """Return all unique DBs that may contain pending deliveries.
 
-        Includes the bridge DB plus every per-agent DB (lazily opened).
+        Includes the bridge DB plus every per-agent DB (lazily opened).  The
+        list is cached and rebuilt only after an agent DB is opened or closed.
         """
+        if self._delivery_dbs is not None:
+            return self._delivery_dbs
         seen_ids: set[int] = {id(self._db)}
         dbs: list[DbConnection] = [self._db]
         for agent_cfg in self._routing.agents.values():
@@ -439,16 +568,19 @@ class WhatsAppConnection:
             if id(db) not in seen_ids:
                 seen_ids.add(id(db))
                 dbs.append(db)
+        self._delivery_dbs = dbs
         return dbs
 
-    def _process_pending_deliveries(self) -> None:
-        for db in self._get_all_delivery_dbs():
-            self._process_deliveries_from_db(db)
+    def _process_pending_deliveries(self) -> int:
+        """Process pending deliveries in all DBs; return how many were found."""
+        return sum(
+            self._process_deliveries_from_db(db) for db in self._get_all_delivery_dbs()
+        )
 
-    def _process_deliveries_from_db(self, db: DbConnection) -> None:
+    def _process_deliveries_from_db(self, db: DbConnection) -> int:
         pending = get_pending_deliveries(db, "wa")
         if not pending:
-            return
+            return 0
 
         for delivery in pending:
             agent, chat_jid_str = self._routing.parse_conversation(
@@ -467,24 +599,60 @@ class WhatsAppConnection:
                 if is_multi and agent:
                     message = f"[{agent.name}]: {message}"
                 self._send_message(jid, message)
-                mark_delivered(db, delivery.id)
+                with write_lock(db):
+                    mark_delivered(db, delivery.id)
                 log.info(
                     "Delivered task result to %s (agent=%s)",
                     chat_jid_str,
                     agent.name if agent else "unknown",
                 )
             except Exception:
-                mark_delivery_failed(db, delivery.id, "send failed")
+                with write_lock(db):
+                    mark_delivery_failed(db, delivery.id, "send failed")
                 log.exception("Failed to deliver to %s", chat_jid_str)
+        return len(pending)
+
+    def _begin_composing(self, chat_jid: str) -> None:
+        """Show the typing indicator while at least one agent is working."""
+        self._composing[chat_jid] = self._composing.get(chat_jid, 0) + 1
+        if self._composing[chat_jid] == 1:
+            self._set_chat_presence(chat_jid, composing=True)
+            self._presence_refresh[chat_jid] = asyncio.ensure_future(
+                self._refresh_composing(chat_jid)
+            )
+
+    def _end_composing(self, chat_jid: str) -> None:
+        """Clear the typing indicator once the last agent for a chat is done."""
+        remaining = self._composing.get(chat_jid, 0) - 1
+        if remaining > 0:
+            self._composing[chat_jid] = remaining
+            return
+        self._composing.pop(chat_jid, None)
+        refresh = self._presence_refresh.pop(chat_jid, None)
+        if refresh is not None:
+            refresh.cancel()
+        self._set_chat_presence(chat_jid, composing=False)
+
+    async def _refresh_composing(self, chat_jid: str) -> None:
+        """Re-assert "composing" periodically; WhatsApp expires the indicator."""
+        while True:
+            await asyncio.sleep(self.PRESENCE_REFRESH_S)
+            self._set_chat_presence(chat_jid, composing=True)
 
     def _set_chat_presence(self, chat_jid: str, composing: bool) -> None:
         """Send a typing indicator (composing/paused) to a WhatsApp chat.
 
         This triggers the "Writing..." indicator in the recipient's app.
+        Repeating the current state within ``PRESENCE_DEBOUNCE_S`` is a no-op.
         Errors are logged and swallowed — presence is best-effort.
         """
         if not self._client:
             return
+        now = time.monotonic()
+        last = self._presence_state.get(chat_jid)
+        if last and last[0] == composing and now - last[1] < self.PRESENCE_DEBOUNCE_S:
+            return
+        self._presence_state[chat_jid] = (composing, now)
         try:
             jid = self._build_jid(chat_jid)
             state = (
@@ -537,9 +705,4 @@ class WhatsAppConnection:
     @staticmethod
     def _build_jid(chat_jid_str: str) -> Any:
         """Build a Neonize JID from a string like 'user@server' or 'id@g.us'."""
-        from neonize.utils.jid import build_jid
-
-        if "@" in chat_jid_str:
-            user, server = chat_jid_str.split("@", 1)
-            return build_jid(user, server)
-        return build_jid(chat_jid_str)
+        return _cached_build_jid(chat_jid_str)
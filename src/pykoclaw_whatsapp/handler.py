@@ -1,21 +1,23 @@
 """Message event handler with Go-thread → asyncio bridge.
 
 Ported from NanoClaw message dispatch (index.ts:859-885) and XML formatting
-(index.ts:204-209). Uses ``asyncio.run_coroutine_threadsafe()`` to bridge
-Neonize Go-thread callbacks into the Python asyncio event loop.
+(index.ts:204-209). Uses ``loop.call_soon_threadsafe()`` to bridge Neonize
+Go-thread callbacks into the Python asyncio event loop.
 """
 
 from __future__ import annotations
 
 import asyncio
+import collections
 import logging
 import re
-from collections.abc import Awaitable, Callable
+import threading
+from collections.abc import Awaitable, Callable, Sequence
 from datetime import datetime, timezone
 from html import escape as html_escape
 from pathlib import Path
 from textwrap import dedent
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, cast
 
 from neonize.events import MessageEv
 from neonize.utils.jid import Jid2String
@@ -23,6 +25,7 @@ from neonize.utils.jid import Jid2String
 from pykoclaw.db import DbConnection
 
 from .attachments import download_and_store
+from .sqlite_tuning import write_lock
 
 if TYPE_CHECKING:
     from neonize.client import NewClient
@@ -39,15 +42,49 @@ _HARD_MENTION_CACHE: dict[str, re.Pattern[str]] = {}
 
 def _build_hard_mention_re(trigger_name: str) -> re.Pattern[str]:
     name = re.escape(trigger_name)
+    return _compile_hard_mention_re(name, name)
+
+
+def _compile_hard_mention_re(at_name: str, lead_name: str) -> re.Pattern[str]:
     return re.compile(
-        rf"@{name}\b"  # @Andy anywhere
+        rf"@(?:{at_name})\b"  # @Andy anywhere
         rf"|(?:^|(?<=\.\s))"  # start-of-string  OR  after ". "
-        rf"{name}"  # the name itself
+        rf"(?:{lead_name})"  # the name itself
         rf"(?=[\s,:!?])",  # followed by separator
         re.IGNORECASE,
     )
 
 
+# One alternation over all trigger names per name list, with a named group
+# per name so ``match.lastgroup`` resolves the match to its name.  ``None``
+# means two matches could overlap -- one name matches a prefix of another,
+# or a name contains "@" or "." -- which a single non-overlapping scan would
+# miss.
+_MULTI_MENTION_CACHE: dict[
+    tuple[str, ...], tuple[re.Pattern[str], dict[str, str]] | None
+] = {}
+
+
+def _build_multi_mention_re(
+    trigger_names: tuple[str, ...],
+) -> tuple[re.Pattern[str], dict[str, str]] | None:
+    for i, name in enumerate(trigger_names):
+        if "@" in name or "." in name:
+            return None
+        prefix_re = re.compile(re.escape(name), re.IGNORECASE)
+        for j, other in enumerate(trigger_names):
+            if i != j and prefix_re.match(other):
+                return None
+    # Longest first, so a shorter name never shadows a longer one.
+    order = sorted(range(len(trigger_names)), key=lambda i: -len(trigger_names[i]))
+    at_names = "|".join(f"(?P<a{i}>{re.escape(trigger_names[i])})" for i in order)
+    lead_names = "|".join(f"(?P<l{i}>{re.escape(trigger_names[i])})" for i in order)
+    by_group: dict[str, str] = {}
+    for i, name in enumerate(trigger_names):
+        by_group[f"a{i}"] = by_group[f"l{i}"] = name
+    return _compile_hard_mention_re(at_names, lead_names), by_group
+
+
 def _is_hard_mention(text: str, trigger_name: str) -> bool:
     """Return *True* if *text* contains a hard mention of *trigger_name*.
 
@@ -62,9 +99,19 @@ def _is_hard_mention(text: str, trigger_name: str) -> bool:
     return _HARD_MENTION_CACHE[trigger_name].search(text) is not None
 
 
-def find_hard_mentions(text: str, trigger_names: list[str]) -> set[str]:
-    """Return the set of trigger names hard-mentioned in *text*."""
-    return {name for name in trigger_names if _is_hard_mention(text, name)}
+def find_hard_mentions(text: str, trigger_names: Sequence[str]) -> set[str]:
+    """Return the set of trigger names hard-mentioned in *text*.
+
+    All names are matched in a single pass over *text*.
+    """
+    key = tuple(trigger_names)
+    if key not in _MULTI_MENTION_CACHE:
+        _MULTI_MENTION_CACHE[key] = _build_multi_mention_re(key)
+    compiled = _MULTI_MENTION_CACHE[key]
+    if compiled is None:
+        return {name for name in trigger_names if _is_hard_mention(text, name)}
+    pattern, by_group = compiled
+    return {by_group[match.lastgroup] for match in pattern.finditer(text)}
 
 
 class BatchAccumulator:
@@ -72,8 +119,9 @@ class BatchAccumulator:
 
     Accumulates messages in per-chat batches. After the first message in a
     batch, a timer fires after ``window_seconds``. Hard mentions flush
-    immediately via :meth:`flush_now`. A per-chat :class:`asyncio.Lock`
-    prevents concurrent agent calls for the same chat.
+    immediately via :meth:`flush_now`, and a batch reaching ``max_messages``
+    (when non-zero) flushes without waiting for the timer. A per-chat
+    :class:`asyncio.Lock` prevents concurrent agent calls for the same chat.
     """
 
     def __init__(
@@ -82,13 +130,24 @@ class BatchAccumulator:
         window_seconds: float,
         loop: asyncio.AbstractEventLoop,
         flush_callback: Callable[[str, bool], Awaitable[None]],
+        max_messages: int = 0,
     ) -> None:
         self._window = window_seconds
+        self._max_messages = max_messages
+        self._counts: dict[str, int] = {}
+        # Chats whose early (max_messages) flush is scheduled but not yet
+        # started; later adds are picked up by that flush.
+        self._early_flushes: set[str] = set()
         self._loop = loop
         self._flush_callback = flush_callback
         self._timers: dict[str, asyncio.TimerHandle] = {}
         self._locks: dict[str, asyncio.Lock] = {}
         self._pending_reflush: set[str] = set()
+        # Go-thread adds are queued here and drained by a single loop
+        # callback, so a burst of messages costs one cross-thread wake-up.
+        self._inbox: collections.deque[str] = collections.deque()
+        self._inbox_lock = threading.Lock()
+        self._inbox_scheduled = False
 
     def _get_lock(self, chat_jid: str) -> asyncio.Lock:
         if chat_jid not in self._locks:
@@ -101,20 +160,42 @@ class BatchAccumulator:
         First message starts the timer. Subsequent messages within the window
         do NOT reset it (debounce, not throttle).  If the chat is currently
         being flushed (lock held), the chat is marked for re-flush.
+        Adds are coalesced: a burst schedules a single drain on the loop.
         """
-        asyncio.run_coroutine_threadsafe(self._add_async(chat_jid), self._loop)
+        self._inbox.append(chat_jid)
+        with self._inbox_lock:
+            if self._inbox_scheduled:
+                return
+            self._inbox_scheduled = True
+        self._loop.call_soon_threadsafe(self._drain_inbox)
+
+    def _drain_inbox(self) -> None:
+        """Apply every queued :meth:`add` in one loop callback."""
+        with self._inbox_lock:
+            self._inbox_scheduled = False
+        while self._inbox:
+            self._add_now(self._inbox.popleft())
 
-    async def _add_async(self, chat_jid: str) -> None:
+    def _add_now(self, chat_jid: str) -> None:
         lock = self._get_lock(chat_jid)
         if lock.locked():
             self._pending_reflush.add(chat_jid)
             return
+        if chat_jid in self._early_flushes:
+            return
         if chat_jid not in self._timers:
             handle = self._loop.call_later(
                 self._window,
                 lambda jid=chat_jid: asyncio.ensure_future(self._timer_expired(jid)),
             )
             self._timers[chat_jid] = handle
+        if self._max_messages:
+            self._counts[chat_jid] = self._counts.get(chat_jid, 0) + 1
+            if self._counts[chat_jid] >= self._max_messages:
+                del self._counts[chat_jid]
+                self._timers.pop(chat_jid).cancel()
+                self._early_flushes.add(chat_jid)
+                asyncio.ensure_future(self._timer_expired(chat_jid))
 
     async def flush_now(self, chat_jid: str) -> None:
         """Immediately flush *chat_jid*'s batch (hard mention / self-chat)."""
@@ -122,12 +203,24 @@ class BatchAccumulator:
             self._timers.pop(chat_jid).cancel()
         await self._do_flush(chat_jid, hard_mention=True)
 
+    def flush_soon(self, chat_jid: str) -> None:
+        """Schedule :meth:`flush_now` on the loop (called from Go thread).
+
+        Unlike ``run_coroutine_threadsafe`` this allocates no
+        ``concurrent.futures.Future`` the caller would never wait on.
+        """
+        self._loop.call_soon_threadsafe(
+            lambda: asyncio.ensure_future(self.flush_now(chat_jid))
+        )
+
     async def _timer_expired(self, chat_jid: str) -> None:
         self._timers.pop(chat_jid, None)
         await self._do_flush(chat_jid, hard_mention=False)
 
     async def _do_flush(self, chat_jid: str, *, hard_mention: bool) -> None:
         lock = self._get_lock(chat_jid)
+        self._counts.pop(chat_jid, None)
+        self._early_flushes.discard(chat_jid)
         async with lock:
             await self._flush_callback(chat_jid, hard_mention)
         if chat_jid in self._pending_reflush:
@@ -168,15 +261,14 @@ def format_xml_message(
     """Format a single message as XML (NanoClaw index.ts:204-209).
 
     When *attachment_path* is set an ``<attachment>`` element is appended so
-    the agent knows to call ``analyze_image`` with that path.
+    the agent knows to call ``analyze_image`` with that path.  *timestamp* is
+    an ISO-8601 string from ``on_message`` and is inserted without escaping.
     """
     body = html_escape(content or "")
     if attachment_path:
         body += f'<attachment type="image" path="{html_escape(attachment_path)}" />'
     return (
-        f'<message sender="{html_escape(sender)}"'
-        f' time="{html_escape(timestamp)}">'
-        f"{body}</message>"
+        f'<message sender="{html_escape(sender)}" time="{timestamp}">{body}</message>'
     )
 
 
@@ -185,7 +277,14 @@ def format_xml_messages(
 ) -> str:
     """Format multiple messages as XML block for agent prompt."""
     lines = [format_xml_message(s, t, c, a) for s, t, c, a in messages]
-    return f"<messages>\n{'\n'.join(lines)}\n</messages>"
+    return "\n".join(["<messages>", *lines, "</messages>"])
+
+
+# SQL is dedented once at import rather than on every call; identical text also
+# keeps the connection's prepared-statement cache hot.
+_INSERT_MESSAGE_SQL = dedent("""\
+    INSERT INTO wa_messages (chat_jid, sender, text, timestamp, is_from_me)
+    VALUES (?, ?, ?, ?, ?)""")
 
 
 def store_message(
@@ -196,13 +295,17 @@ def store_message(
     timestamp: str,
     is_from_me: bool,
 ) -> None:
-    db.execute(
-        dedent("""\
-            INSERT INTO wa_messages (chat_jid, sender, text, timestamp, is_from_me)
-            VALUES (?, ?, ?, ?, ?)"""),
-        (chat_jid, sender, text, timestamp, 1 if is_from_me else 0),
-    )
-    db.commit()
+    with write_lock(db):
+        db.execute(
+            _INSERT_MESSAGE_SQL,
+            (chat_jid, sender, text, timestamp, 1 if is_from_me else 0),
+        )
+        db.commit()
+
+
+_INSERT_ATTACHMENT_SQL = dedent("""\
+    INSERT INTO wa_attachments (chat_jid, message_timestamp, file_path, mime_type)
+    VALUES (?, ?, ?, ?)""")
 
 
 def store_attachment(
@@ -214,49 +317,69 @@ def store_attachment(
     mime_type: str,
 ) -> None:
     """Record a downloaded attachment in ``wa_attachments``."""
-    db.execute(
-        dedent("""\
-            INSERT INTO wa_attachments (chat_jid, message_timestamp, file_path, mime_type)
-            VALUES (?, ?, ?, ?)"""),
-        (chat_jid, message_timestamp, file_path, mime_type),
-    )
-    db.commit()
+    with write_lock(db):
+        db.execute(
+            _INSERT_ATTACHMENT_SQL,
+            (chat_jid, message_timestamp, file_path, mime_type),
+        )
+        db.commit()
+
+
+_UPSERT_CHAT_TIMESTAMP_SQL = dedent("""\
+    INSERT INTO wa_chats (jid, last_timestamp)
+    VALUES (?, ?)
+    ON CONFLICT(jid) DO UPDATE SET last_timestamp = excluded.last_timestamp""")
 
 
 def update_chat_timestamp(db: DbConnection, chat_jid: str, timestamp: str) -> None:
-    db.execute(
-        dedent("""\
-            INSERT INTO wa_chats (jid, last_timestamp)
-            VALUES (?, ?)
-            ON CONFLICT(jid) DO UPDATE SET last_timestamp = excluded.last_timestamp"""),
-        (chat_jid, timestamp),
-    )
-    db.commit()
+    with write_lock(db):
+        db.execute(
+            _UPSERT_CHAT_TIMESTAMP_SQL,
+            (chat_jid, timestamp),
+        )
+        db.commit()
+
+
+_UPSERT_GLOBAL_CURSOR_SQL = dedent("""\
+    INSERT INTO wa_config (key, value)
+    VALUES ('last_timestamp', ?)
+    ON CONFLICT(key) DO UPDATE SET value = excluded.value""")
 
 
 def update_global_cursor(db: DbConnection, timestamp: str) -> None:
     """Update global last_timestamp cursor (NanoClaw dual-cursor: index.ts:60-64)."""
-    db.execute(
-        dedent("""\
-            INSERT INTO wa_config (key, value)
-            VALUES ('last_timestamp', ?)
-            ON CONFLICT(key) DO UPDATE SET value = excluded.value"""),
-        (timestamp,),
-    )
-    db.commit()
+    with write_lock(db):
+        db.execute(
+            _UPSERT_GLOBAL_CURSOR_SQL,
+            (timestamp,),
+        )
+        db.commit()
+
+
+_UPSERT_AGENT_CURSOR_SQL = dedent("""\
+    INSERT INTO wa_chats (jid, last_agent_timestamp)
+    VALUES (?, ?)
+    ON CONFLICT(jid) DO UPDATE SET
+        last_agent_timestamp = excluded.last_agent_timestamp""")
 
 
 def update_agent_cursor(db: DbConnection, chat_jid: str, timestamp: str) -> None:
     """Update per-chat agent timestamp cursor (NanoClaw dual-cursor: index.ts:60-64)."""
-    db.execute(
-        dedent("""\
-            INSERT INTO wa_chats (jid, last_agent_timestamp)
-            VALUES (?, ?)
-            ON CONFLICT(jid) DO UPDATE SET
-                last_agent_timestamp = excluded.last_agent_timestamp"""),
-        (chat_jid, timestamp),
-    )
-    db.commit()
+    with write_lock(db):
+        db.execute(
+            _UPSERT_AGENT_CURSOR_SQL,
+            (chat_jid, timestamp),
+        )
+        db.commit()
+
+
+_NEW_MESSAGES_SQL = dedent("""\
+    SELECT m.sender, m.timestamp, m.text, a.file_path
+    FROM wa_messages m
+    LEFT JOIN wa_attachments a
+        ON a.chat_jid = m.chat_jid AND a.message_timestamp = m.timestamp
+    WHERE m.chat_jid = ? AND m.timestamp > ?
+    ORDER BY m.timestamp""")
 
 
 def get_new_messages_for_chat(
@@ -273,24 +396,18 @@ def get_new_messages_for_chat(
     ).fetchone()
     since = row["last_agent_timestamp"] if row and row["last_agent_timestamp"] else ""
 
-    rows = db.execute(
-        dedent("""\
-            SELECT m.sender, m.timestamp, m.text, a.file_path
-            FROM wa_messages m
-            LEFT JOIN wa_attachments a
-                ON a.chat_jid = m.chat_jid AND a.message_timestamp = m.timestamp
-            WHERE m.chat_jid = ? AND m.timestamp > ?
-            ORDER BY m.timestamp"""),
-        (chat_jid, since),
-    ).fetchall()
-    return [(r["sender"], r["timestamp"], r["text"], r["file_path"]) for r in rows]
+    rows = db.execute(_NEW_MESSAGES_SQL, (chat_jid, since)).fetchall()
+    # Columns are already selected in tuple order; tuple() copies a Row in C.
+    return cast(
+        "list[tuple[str, str, str | None, str | None]]", [tuple(r) for r in rows]
+    )
 
 
 class MessageHandler:
     """Handles incoming WhatsApp messages.
 
-    Bridges Neonize Go-thread callbacks into the asyncio event loop using
-    ``asyncio.run_coroutine_threadsafe()``.
+    Bridges Neonize Go-thread callbacks into the asyncio event loop via
+    :meth:`BatchAccumulator.add` and :meth:`BatchAccumulator.flush_soon`.
     """
 
     def __init__(
@@ -298,7 +415,7 @@ class MessageHandler:
         *,
         db: DbConnection,
         outgoing_queue: OutgoingQueue,
-        trigger_names: list[str],
+        trigger_names: Sequence[str],
         loop: asyncio.AbstractEventLoop,
         batch_accumulator: BatchAccumulator,
         data_dir: Path,
@@ -312,9 +429,11 @@ class MessageHandler:
         self._data_dir = data_dir
         self._agent_callback = agent_callback
         self._self_jid: str | None = None
+        self._self_user: str | None = None
 
     def set_self_jid(self, jid_str: str) -> None:
         self._self_jid = jid_str
+        self._self_user = jid_str.partition("@")[0]
 
     def on_message(self, client: NewClient, event: MessageEv) -> None:
         try:
@@ -373,8 +492,8 @@ class MessageHandler:
                 return
 
             is_self_chat = (
-                self._self_jid is not None
-                and chat_jid.split("@")[0] == self._self_jid.split("@")[0]
+                self._self_user is not None
+                and chat_jid.partition("@")[0] == self._self_user
                 and not source.IsGroup
             )
 
@@ -393,10 +512,7 @@ class MessageHandler:
                 log.debug(
                     "Flushing immediately for %s (self_chat=%s)", chat_jid, is_self_chat
                 )
-                asyncio.run_coroutine_threadsafe(
-                    self._batch_accumulator.flush_now(chat_jid),
-                    self._loop,
-                )
+                self._batch_accumulator.flush_soon(chat_jid)
             else:
                 log.debug("Adding to batch window for %s", chat_jid)
                 self._batch_accumulator.add(chat_jid)
@@ -0,0 +1,70 @@
+"""Debounced writer for assistant messages queued via the MCP tool."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from textwrap import dedent
+from typing import TYPE_CHECKING
+
+from .sqlite_tuning import write_lock
+
+if TYPE_CHECKING:
+    from pykoclaw.db import DbConnection
+
+log = logging.getLogger(__name__)
+
+_INSERT_SQL = dedent("""\
+    INSERT INTO wa_messages
+        (chat_jid, sender, text, timestamp, is_from_me)
+    VALUES (?, ?, ?, datetime('now'), 1)""")
+
+
+class MessageOutbox:
+    """Buffer ``wa_messages`` inserts and write them in one transaction.
+
+    The first :meth:`put` schedules a flush after ``delay`` seconds on the
+    running event loop; rows added before it fires share the same commit.
+    """
+
+    def __init__(self, db: DbConnection, *, delay: float = 0.05) -> None:
+        self._db = db
+        self._delay = delay
+        self._rows: list[tuple[str, str, str]] = []
+        self._handle: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def put(self, chat_jid: str, text: str) -> None:
+        """Queue an assistant message for *chat_jid*."""
+        self._rows.append((chat_jid, "assistant", text))
+        loop = asyncio.get_running_loop()
+        # A timer armed on another (possibly closed) loop may never fire.
+        if self._handle is None or self._loop is not loop:
+            if self._handle is not None:
+                self._handle.cancel()
+            self._loop = loop
+            self._handle = loop.call_later(self._delay, self.flush)
+
+    def flush(self) -> None:
+        """Write all buffered rows with a single ``executemany`` + commit.
+
+        If the write fails the error is logged and the rows are kept and
+        retried after ``delay``, since the tool has already acknowledged them.
+        """
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        # The rollback must not discard another thread's pending write.
+        with write_lock(self._db):
+            try:
+                self._db.executemany(_INSERT_SQL, rows)
+                self._db.commit()
+            except Exception:
+                log.exception("Failed to write %d queued message(s)", len(rows))
+                self._db.rollback()
+                self._rows[:0] = rows
+        if self._rows and self._loop is not None and not self._loop.is_closed():
+            self._handle = self._loop.call_later(self._delay, self.flush)
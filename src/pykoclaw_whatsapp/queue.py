@@ -13,13 +13,15 @@ from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from neonize.client import NewClient
     from neonize.proto.Neonize_pb2 import JID
 
 log = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class QueuedMessage:
     """A message waiting to be sent."""
 
@@ -61,40 +63,58 @@ class OutgoingQueue:
     def send(self, client: NewClient, jid: JID, text: str) -> None:
         """Send a message, queuing it if disconnected or on failure."""
         with self._lock:
-            if not self._connected:
-                self._queue.append(QueuedMessage(jid=jid, text=text))
-                log.info(
-                    "Message queued (jid=%s, len=%d, queue_size=%d)",
-                    getattr(jid, "User", "?"),
-                    len(text),
-                    len(self._queue),
-                )
-                return
-            try:
-                client.send_message(jid, text)
-                log.info(
-                    "Message sent (jid=%s, len=%d)",
-                    getattr(jid, "User", "?"),
-                    len(text),
-                )
-            except Exception:
-                self._queue.append(QueuedMessage(jid=jid, text=text))
-                log.warning(
-                    "Failed to send, message queued (jid=%s, queue_size=%d)",
-                    getattr(jid, "User", "?"),
-                    len(self._queue),
-                    exc_info=True,
-                )
+            self._send_locked(client, jid, text)
+
+    def send_many(self, client: NewClient, items: Iterable[tuple[JID, str]]) -> None:
+        """Send several messages while holding the queue lock once.
+
+        Each item is handled like :meth:`send`: queued if disconnected or if
+        sending it fails.
+        """
+        with self._lock:
+            for jid, text in items:
+                self._send_locked(client, jid, text)
+
+    def _send_locked(self, client: NewClient, jid: JID, text: str) -> None:
+        """Body of :meth:`send`; the caller holds ``_lock``."""
+        if not self._connected:
+            self._queue.append(QueuedMessage(jid=jid, text=text))
+            log.info(
+                "Message queued (jid=%s, len=%d, queue_size=%d)",
+                getattr(jid, "User", "?"),
+                len(text),
+                len(self._queue),
+            )
+            return
+        try:
+            client.send_message(jid, text)
+            log.info(
+                "Message sent (jid=%s, len=%d)",
+                getattr(jid, "User", "?"),
+                len(text),
+            )
+        except Exception:
+            self._queue.append(QueuedMessage(jid=jid, text=text))
+            log.warning(
+                "Failed to send, message queued (jid=%s, queue_size=%d)",
+                getattr(jid, "User", "?"),
+                len(self._queue),
+                exc_info=True,
+            )
 
     def flush(self, client: NewClient) -> None:
-        """Flush all queued messages. Called on reconnect."""
+        """Flush all queued messages. Called on reconnect.
+
+        Messages that fail again are re-queued for the next flush rather than
+        retried in the same pass.
+        """
         with self._lock:
             if not self._queue:
                 return
             log.info("Flushing outgoing message queue (count=%d)", len(self._queue))
-            while self._queue:
-                item = self._queue.popleft()
-                self.send(client, item.jid, item.text)
+            pending = list(self._queue)
+            self._queue.clear()
+            self.send_many(client, ((item.jid, item.text) for item in pending))
 
     def __len__(self) -> int:
         return len(self._queue)
@@ -31,7 +31,7 @@ from pathlib import Path
 log = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AgentConfig:
     """Configuration for a single agent personality."""
 
@@ -40,31 +40,55 @@ class AgentConfig:
     data_dir: Path | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class RoutingConfig:
-    """Multi-agent group routing configuration."""
+    """Multi-agent group routing configuration.
+
+    Lookup tables are derived from ``agents`` and ``routes`` at construction,
+    so treat both as read-only afterwards.
+    """
 
     default_agent: str
     agents: dict[str, AgentConfig] = field(default_factory=dict)
     routes: dict[str, list[str]] = field(default_factory=dict)
+    _prefixes: tuple[tuple[str, AgentConfig], ...] = field(
+        init=False, repr=False, compare=False
+    )
+    _trigger_names: tuple[str, ...] = field(init=False, repr=False, compare=False)
+    _chat_agents: dict[str, tuple[AgentConfig, ...]] = field(
+        init=False, repr=False, compare=False
+    )
+    _default_agents: tuple[AgentConfig, ...] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        self._prefixes = tuple(
+            (f"wa-{agent.name.lower()}-", agent) for agent in self.agents.values()
+        )
+        self._trigger_names = tuple(a.name for a in self.agents.values())
+        self._chat_agents = {
+            jid: tuple(self.agents[name] for name in names)
+            for jid, names in self.routes.items()
+        }
+        default = self.agents.get(self.default_agent)
+        self._default_agents = (default,) if default else ()
 
-    def agents_for_chat(self, chat_jid: str) -> list[AgentConfig]:
+    def agents_for_chat(self, chat_jid: str) -> tuple[AgentConfig, ...]:
         """Return the agent(s) mapped to a chat JID.
 
         Groups not in the routing table and all DMs use the default agent.
         """
-        if chat_jid in self.routes:
-            return [self.agents[name] for name in self.routes[chat_jid]]
-        return [self.agents[self.default_agent]]
+        return self._chat_agents.get(chat_jid) or self._default_agents
 
     def is_multi_agent(self, chat_jid: str) -> bool:
         """Return True if the chat has multiple agents mapped."""
-        return chat_jid in self.routes and len(self.routes[chat_jid]) > 1
+        return len(self._chat_agents.get(chat_jid, ())) > 1
 
     @property
-    def all_trigger_names(self) -> list[str]:
+    def all_trigger_names(self) -> tuple[str, ...]:
         """Return all agent names (for hard mention detection)."""
-        return [a.name for a in self.agents.values()]
+        return self._trigger_names
 
     def conversation_name(self, agent: AgentConfig, chat_jid: str) -> str:
         """Build the conversation name for an agent + chat pair.
@@ -78,8 +102,7 @@ class RoutingConfig:
 
         Returns ``(None, "")`` if the conversation doesn't match any known agent.
         """
-        for agent in self.agents.values():
-            prefix = f"wa-{agent.name.lower()}-"
+        for prefix, agent in self._prefixes:
             if conversation.startswith(prefix):
                 return agent, conversation[len(prefix) :]
         return None, ""
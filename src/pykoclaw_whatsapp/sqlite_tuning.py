@@ -0,0 +1,61 @@
+"""SQLite pragma and locking helpers for the bridge and session databases."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pykoclaw.db import DbConnection
+
+_BRIDGE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",  # 256 MiB
+    "PRAGMA cache_size=-65536",  # 64 MiB (negative = KiB)
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA wal_autocheckpoint=1000",
+)
+
+
+_WRITE_LOCKS: dict[DbConnection, threading.RLock] = {}
+_WRITE_LOCKS_GUARD = threading.Lock()
+
+
+def write_lock(db: DbConnection) -> threading.RLock:
+    """Return the lock serializing write-and-commit units on *db*.
+
+    The bridge connection is shared by the neonize Go thread and the asyncio
+    loop thread.  Holding this lock from a write through its ``commit()`` or
+    ``rollback()`` keeps one thread from rolling back the other's statement.
+    """
+    with _WRITE_LOCKS_GUARD:
+        lock = _WRITE_LOCKS.get(db)
+        if lock is None:
+            lock = _WRITE_LOCKS[db] = threading.RLock()
+        return lock
+
+
+def tune_bridge_db(db: DbConnection) -> None:
+    """Apply WAL, page-cache and mmap pragmas to an open pykoclaw DB."""
+    for pragma in _BRIDGE_PRAGMAS:
+        db.execute(pragma)
+
+
+def tune_session_db(path: Path) -> None:
+    """Switch the neonize session DB to WAL before neonize opens it.
+
+    ``journal_mode=WAL`` is persistent in the database file, so setting it
+    once here also applies to neonize's own connection.  ``synchronous`` is
+    per-connection and is only set for completeness on this short-lived one.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA wal_autocheckpoint=1000")
+    finally:
+        conn.close()
@@ -0,0 +1,24 @@
+"""Tests for the shared background event loop."""
+
+from __future__ import annotations
+
+import asyncio
+
+from pykoclaw_whatsapp.background_loop import get_background_loop, submit
+
+
+def test_background_loop_is_shared_and_running() -> None:
+    """Test that the loop is created once and runs on its own thread."""
+    loop = get_background_loop()
+
+    assert get_background_loop() is loop
+    assert loop.is_running()
+
+
+def test_submit_runs_coroutine_on_background_loop() -> None:
+    """Test that submit returns a future resolved by the background loop."""
+
+    async def current_loop() -> asyncio.AbstractEventLoop:
+        return asyncio.get_running_loop()
+
+    assert submit(current_loop()).result(timeout=5) is get_background_loop()
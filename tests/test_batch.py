@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 import asyncio
-from unittest.mock import AsyncMock, Mock
+import threading
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
@@ -12,155 +13,130 @@ pytest.importorskip("neonize")
 from pykoclaw_whatsapp.handler import BatchAccumulator
 
 
-@pytest.mark.asyncio
-async def test_timer_fires_after_window() -> None:
-    flush_cb = AsyncMock()
-    captured: list[tuple[float, object]] = []
-
-    loop = asyncio.get_running_loop()
+def _capture_call_later(
+    monkeypatch: pytest.MonkeyPatch,
+    loop: asyncio.AbstractEventLoop,
+    handle: Mock | None = None,
+) -> list[tuple[float, object]]:
+    """Replace ``loop.call_later`` with a recorder; undone at test teardown.
 
-    original_call_later = loop.call_later
+    Every call returns *handle*, or a fresh ``Mock`` when it is not given.
+    """
+    captured: list[tuple[float, object]] = []
 
     def mock_call_later(delay: float, callback: object, *args: object) -> Mock:
-        handle = Mock()
-        handle.cancel = Mock()
         captured.append((delay, callback))
-        return handle
+        return handle or Mock()
 
-    loop.call_later = mock_call_later  # type: ignore[assignment]
-    try:
-        acc = BatchAccumulator(window_seconds=5.0, loop=loop, flush_callback=flush_cb)
-        await acc._add_async("chat_a")
+    monkeypatch.setattr(loop, "call_later", mock_call_later)
+    return captured
 
-        assert len(captured) == 1
-        assert captured[0][0] == 5.0
 
-        await acc._timer_expired("chat_a")
-
-        flush_cb.assert_called_once_with("chat_a", False)
-    finally:
-        loop.call_later = original_call_later  # type: ignore[assignment]
+async def _add(acc: BatchAccumulator, *chat_jids: str) -> None:
+    """Call ``add()`` for each chat, then let the loop drain the inbox."""
+    for chat_jid in chat_jids:
+        acc.add(chat_jid)
+    await asyncio.sleep(0)
 
 
 @pytest.mark.asyncio
-async def test_multiple_messages_single_flush() -> None:
+async def test_timer_fires_after_window(monkeypatch: pytest.MonkeyPatch) -> None:
     flush_cb = AsyncMock()
-    captured: list[tuple[float, object]] = []
-
     loop = asyncio.get_running_loop()
-    original_call_later = loop.call_later
+    captured = _capture_call_later(monkeypatch, loop)
 
-    def mock_call_later(delay: float, callback: object, *args: object) -> Mock:
-        handle = Mock()
-        handle.cancel = Mock()
-        captured.append((delay, callback))
-        return handle
-
-    loop.call_later = mock_call_later  # type: ignore[assignment]
-    try:
-        acc = BatchAccumulator(window_seconds=5.0, loop=loop, flush_callback=flush_cb)
-        await acc._add_async("chat_a")
-        await acc._add_async("chat_a")
-        await acc._add_async("chat_a")
+    acc = BatchAccumulator(window_seconds=5.0, loop=loop, flush_callback=flush_cb)
+    await _add(acc, "chat_a")
 
-        assert len(captured) == 1
+    assert len(captured) == 1
+    assert captured[0][0] == 5.0
 
-        await acc._timer_expired("chat_a")
+    await acc._timer_expired("chat_a")
 
-        flush_cb.assert_called_once_with("chat_a", False)
-    finally:
-        loop.call_later = original_call_later  # type: ignore[assignment]
+    flush_cb.assert_called_once_with("chat_a", False)
 
 
 @pytest.mark.asyncio
-async def test_independent_chat_timers() -> None:
+async def test_multiple_messages_single_flush(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
     flush_cb = AsyncMock()
-    captured: list[tuple[float, object, str]] = []
-
     loop = asyncio.get_running_loop()
-    original_call_later = loop.call_later
+    captured = _capture_call_later(monkeypatch, loop)
 
-    def mock_call_later(delay: float, callback: object, *args: object) -> Mock:
-        handle = Mock()
-        handle.cancel = Mock()
-        captured.append((delay, callback, "timer"))
-        return handle
+    acc = BatchAccumulator(window_seconds=5.0, loop=loop, flush_callback=flush_cb)
+    await _add(acc, "chat_a", "chat_a", "chat_a")
+
+    assert len(captured) == 1
 
-    loop.call_later = mock_call_later  # type: ignore[assignment]
-    try:
-        acc = BatchAccumulator(window_seconds=5.0, loop=loop, flush_callback=flush_cb)
-        await acc._add_async("chat_a")
-        await acc._add_async("chat_b")
+    await acc._timer_expired("chat_a")
 
-        assert len(captured) == 2
-    finally:
-        loop.call_later = original_call_later  # type: ignore[assignment]
+    flush_cb.assert_called_once_with("chat_a", False)
 
 
 @pytest.mark.asyncio
-async def test_hard_mention_flush() -> None:
+async def test_independent_chat_timers(monkeypatch: pytest.MonkeyPatch) -> None:
     flush_cb = AsyncMock()
-    timer_handle = Mock()
-    timer_handle.cancel = Mock()
-
     loop = asyncio.get_running_loop()
-    original_call_later = loop.call_later
+    captured = _capture_call_later(monkeypatch, loop)
 
-    def mock_call_later(delay: float, callback: object, *args: object) -> Mock:
-        return timer_handle
-
-    loop.call_later = mock_call_later  # type: ignore[assignment]
-    try:
-        acc = BatchAccumulator(window_seconds=5.0, loop=loop, flush_callback=flush_cb)
-        await acc._add_async("chat_a")
-        await acc.flush_now("chat_a")
+    acc = BatchAccumulator(window_seconds=5.0, loop=loop, flush_callback=flush_cb)
+    await _add(acc, "chat_a", "chat_b")
 
-        timer_handle.cancel.assert_called_once()
-        flush_cb.assert_called_once_with("chat_a", True)
-    finally:
-        loop.call_later = original_call_later  # type: ignore[assignment]
+    assert len(captured) == 2
 
 
 @pytest.mark.asyncio
-async def test_hard_mention_includes_accumulated() -> None:
+async def test_hard_mention_flush(monkeypatch: pytest.MonkeyPatch) -> None:
     flush_cb = AsyncMock()
     timer_handle = Mock()
-    timer_handle.cancel = Mock()
-
     loop = asyncio.get_running_loop()
-    original_call_later = loop.call_later
+    _capture_call_later(monkeypatch, loop, timer_handle)
 
-    def mock_call_later(delay: float, callback: object, *args: object) -> Mock:
-        return timer_handle
+    acc = BatchAccumulator(window_seconds=5.0, loop=loop, flush_callback=flush_cb)
+    await _add(acc, "chat_a")
+    await acc.flush_now("chat_a")
+
+    timer_handle.cancel.assert_called_once()
+    flush_cb.assert_called_once_with("chat_a", True)
 
-    loop.call_later = mock_call_later  # type: ignore[assignment]
-    try:
-        acc = BatchAccumulator(window_seconds=5.0, loop=loop, flush_callback=flush_cb)
-        await acc._add_async("chat_a")
-        await acc._add_async("chat_a")
-        await acc.flush_now("chat_a")
 
-        flush_cb.assert_called_once_with("chat_a", True)
-        assert "chat_a" not in acc._timers
-    finally:
-        loop.call_later = original_call_later  # type: ignore[assignment]
+@pytest.mark.asyncio
+async def test_hard_mention_includes_accumulated(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    flush_cb = AsyncMock()
+    loop = asyncio.get_running_loop()
+    _capture_call_later(monkeypatch, loop, Mock())
+
+    acc = BatchAccumulator(window_seconds=5.0, loop=loop, flush_callback=flush_cb)
+    await _add(acc, "chat_a", "chat_a")
+    await acc.flush_now("chat_a")
+
+    flush_cb.assert_called_once_with("chat_a", True)
+    assert "chat_a" not in acc._timers
 
 
 @pytest.mark.asyncio
 async def test_concurrent_flush_blocked() -> None:
     call_order: list[str] = []
+    entered = asyncio.Event()
+    release = asyncio.Event()
 
     async def slow_flush(chat_jid: str, hard_mention: bool) -> None:
         call_order.append(f"start-{chat_jid}-{hard_mention}")
-        await asyncio.sleep(0.1)
+        entered.set()
+        await release.wait()
         call_order.append(f"end-{chat_jid}-{hard_mention}")
 
     loop = asyncio.get_running_loop()
     acc = BatchAccumulator(window_seconds=5.0, loop=loop, flush_callback=slow_flush)
 
     t1 = asyncio.create_task(acc.flush_now("chat_a"))
-    await asyncio.sleep(0.01)
+    await entered.wait()
     t2 = asyncio.create_task(acc._do_flush("chat_a", hard_mention=False))
+    await asyncio.sleep(0)  # let t2 reach the chat lock while t1 holds it
+    release.set()
 
     await asyncio.gather(t1, t2)
 
@@ -171,17 +147,9 @@ async def test_concurrent_flush_blocked() -> None:
 
 
 @pytest.mark.asyncio
-async def test_pending_reflush() -> None:
-    call_later_calls: list[tuple[float, object]] = []
-
+async def test_pending_reflush(monkeypatch: pytest.MonkeyPatch) -> None:
     loop = asyncio.get_running_loop()
-    original_call_later = loop.call_later
-
-    def mock_call_later(delay: float, callback: object, *args: object) -> Mock:
-        handle = Mock()
-        handle.cancel = Mock()
-        call_later_calls.append((delay, callback))
-        return handle
+    call_later_calls = _capture_call_later(monkeypatch, loop)
 
     flush_count = 0
     flush_entered = asyncio.Event()
@@ -194,26 +162,22 @@ async def test_pending_reflush() -> None:
             flush_entered.set()
             await flush_proceed.wait()
 
-    loop.call_later = mock_call_later  # type: ignore[assignment]
-    try:
-        acc = BatchAccumulator(
-            window_seconds=5.0, loop=loop, flush_callback=controlled_flush
-        )
+    acc = BatchAccumulator(
+        window_seconds=5.0, loop=loop, flush_callback=controlled_flush
+    )
 
-        flush_task = asyncio.create_task(acc.flush_now("chat_a"))
-        await asyncio.sleep(0)
-        await flush_entered.wait()
+    flush_task = asyncio.create_task(acc.flush_now("chat_a"))
+    await asyncio.sleep(0)
+    await flush_entered.wait()
 
-        await acc._add_async("chat_a")
-        assert "chat_a" in acc._pending_reflush
+    await _add(acc, "chat_a")
+    assert "chat_a" in acc._pending_reflush
 
-        flush_proceed.set()
-        await flush_task
+    flush_proceed.set()
+    await flush_task
 
-        assert "chat_a" not in acc._pending_reflush
-        assert len(call_later_calls) >= 1
-    finally:
-        loop.call_later = original_call_later  # type: ignore[assignment]
+    assert "chat_a" not in acc._pending_reflush
+    assert len(call_later_calls) >= 1
 
 
 @pytest.mark.asyncio
@@ -240,3 +204,85 @@ def test_module_imports() -> None:
     assert BA is not None
     assert callable(getattr(BA, "add", None))
     assert callable(getattr(BA, "flush_now", None))
+
+
+@pytest.mark.asyncio
+async def test_add_from_thread_coalesces_into_one_drain() -> None:
+    """A burst of add() calls from another thread schedules a single drain."""
+    loop = asyncio.get_running_loop()
+    callback = AsyncMock()
+    acc = BatchAccumulator(window_seconds=60, loop=loop, flush_callback=callback)
+
+    with patch.object(acc, "_drain_inbox", wraps=acc._drain_inbox) as drain:
+        thread = threading.Thread(
+            target=lambda: [acc.add(jid) for jid in ("chat_a", "chat_a", "chat_b")]
+        )
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0)
+
+        assert drain.call_count == 1
+    assert set(acc._timers) == {"chat_a", "chat_b"}
+    for handle in acc._timers.values():
+        handle.cancel()
+
+
+@pytest.mark.asyncio
+async def test_max_messages_flushes_early() -> None:
+    """Reaching max_messages flushes before the batch window elapses."""
+    loop = asyncio.get_running_loop()
+    callback = AsyncMock()
+    acc = BatchAccumulator(
+        window_seconds=60, loop=loop, flush_callback=callback, max_messages=3
+    )
+
+    await _add(acc, "chat_a", "chat_a")
+    callback.assert_not_called()
+
+    await _add(acc, "chat_a")
+    await asyncio.sleep(0)
+
+    callback.assert_awaited_once_with("chat_a", False)
+    assert "chat_a" not in acc._timers
+
+
+@pytest.mark.asyncio
+async def test_max_messages_from_thread_flushes_once() -> None:
+    """A cross-thread burst past max_messages schedules a single flush."""
+    loop = asyncio.get_running_loop()
+    callback = AsyncMock()
+    acc = BatchAccumulator(
+        window_seconds=60, loop=loop, flush_callback=callback, max_messages=2
+    )
+
+    def burst() -> None:
+        for _ in range(6):
+            acc.add("chat_a")
+
+    thread = threading.Thread(target=burst)
+    thread.start()
+    thread.join()
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    callback.assert_awaited_once_with("chat_a", False)
+    assert "chat_a" not in acc._timers
+
+
+@pytest.mark.asyncio
+async def test_flush_soon_from_thread_flushes_on_loop() -> None:
+    """flush_soon() from another thread runs a hard-mention flush on the loop."""
+    loop = asyncio.get_running_loop()
+    flushed = asyncio.Event()
+
+    async def callback(chat_jid: str, hard_mention: bool) -> None:
+        assert (chat_jid, hard_mention) == ("chat_a", True)
+        flushed.set()
+
+    acc = BatchAccumulator(window_seconds=60, loop=loop, flush_callback=callback)
+
+    thread = threading.Thread(target=acc.flush_soon, args=("chat_a",))
+    thread.start()
+    thread.join()
+
+    await asyncio.wait_for(flushed.wait(), timeout=1)
@@ -7,7 +7,7 @@ from textwrap import dedent
 
 import pytest
 
-from pykoclaw_whatsapp.config import WhatsAppSettings
+from pykoclaw_whatsapp.config import WhatsAppSettings, get_config
 
 
 class TestWhatsAppSettingsDefaults:
@@ -272,3 +272,15 @@ class TestWhatsAppSettingsMissingEnvFile:
         settings = WhatsAppSettings()
 
         assert settings.trigger_name == "Andy"
+
+
+def test_get_config_is_cached() -> None:
+    """Test that get_config returns the same instance until the cache is cleared."""
+    get_config.cache_clear()
+    try:
+        first = get_config()
+        assert get_config() is first
+        get_config.cache_clear()
+        assert get_config() is not first
+    finally:
+        get_config.cache_clear()
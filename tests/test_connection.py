@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
+import asyncio
 import sqlite3
 from pathlib import Path
 from textwrap import dedent
+from typing import Any
 from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
@@ -12,7 +14,9 @@ import pytest
 pytest.importorskip("neonize")
 
 from pykoclaw_messaging.dispatch import DispatchResult
+from pykoclaw_whatsapp.config import WhatsAppSettings
 from pykoclaw_whatsapp.connection import WhatsAppConnection
+from pykoclaw_whatsapp.routing import AgentConfig, RoutingConfig
 
 MOCK_TARGET = "pykoclaw_whatsapp.connection.dispatch_to_agent"
 
@@ -73,8 +77,6 @@ def db() -> sqlite3.Connection:
 def connection(
     db: sqlite3.Connection, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
 ) -> WhatsAppConnection:
-    from pykoclaw_whatsapp.config import WhatsAppSettings
-
     monkeypatch.chdir(tmp_path)
 
     config = WhatsAppSettings(trigger_name="Andy")
@@ -83,20 +85,22 @@ def connection(
     return conn
 
 
+_SEED_MESSAGE_SQL = dedent("""\
+    INSERT INTO wa_messages (chat_jid, sender, text, timestamp, is_from_me)
+    VALUES (?, ?, ?, ?, 0)""")
+
+_SEED_CHAT_SQL = dedent("""\
+    INSERT OR IGNORE INTO wa_chats (jid, last_timestamp)
+    VALUES (?, ?)""")
+
+
 def _seed_messages(db: sqlite3.Connection, chat_jid: str, count: int = 1) -> None:
-    for i in range(count):
-        db.execute(
-            dedent("""\
-                INSERT INTO wa_messages (chat_jid, sender, text, timestamp, is_from_me)
-                VALUES (?, ?, ?, ?, 0)"""),
-            (chat_jid, f"User{i}", f"Message {i}", f"2024-01-01T12:0{i}:00Z"),
-        )
-        db.execute(
-            dedent("""\
-                INSERT OR IGNORE INTO wa_chats (jid, last_timestamp)
-                VALUES (?, ?)"""),
-            (chat_jid, f"2024-01-01T12:0{i}:00Z"),
-        )
+    timestamps = [f"2024-01-01T12:0{i}:00Z" for i in range(count)]
+    db.executemany(
+        _SEED_MESSAGE_SQL,
+        [(chat_jid, f"User{i}", f"Message {i}", ts) for i, ts in enumerate(timestamps)],
+    )
+    db.executemany(_SEED_CHAT_SQL, [(chat_jid, ts) for ts in timestamps])
     db.commit()
 
 
@@ -358,6 +362,27 @@ async def test_extract_reply_unit() -> None:
     assert "Reasoning" not in result
 
 
+@pytest.mark.parametrize(
+    "text",
+    [
+        "<reply>unclosed",
+        "</reply><reply>a</reply>",
+        "<reply><reply>nested</reply></reply>",
+        "<reply>a</reply>x<reply>b",
+        "<reply></reply><reply> b </reply>",
+    ],
+)
+def test_extract_reply_matches_regex(text: str) -> None:
+    """Test that the str.find scanner agrees with the non-greedy regex."""
+    import re
+
+    from pykoclaw_whatsapp.connection import _extract_reply
+
+    matches = [m.strip() for m in re.findall(r"<reply>(.*?)</reply>", text, re.DOTALL)]
+    expected = "\n".join(m for m in matches if m) or None
+    assert _extract_reply(text) == expected
+
+
 # --- Multi-agent routing tests ---
 
 
@@ -366,9 +391,6 @@ def multi_agent_connection(
     db: sqlite3.Connection, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
 ) -> WhatsAppConnection:
     """Connection with two agents: Ressu (default) and Tyko, both in group-multi."""
-    from pykoclaw_whatsapp.config import WhatsAppSettings
-    from pykoclaw_whatsapp.routing import AgentConfig, RoutingConfig
-
     monkeypatch.chdir(tmp_path)
 
     routing = RoutingConfig(
@@ -393,7 +415,7 @@ def multi_agent_connection(
 async def test_multi_agent_dispatches_to_both(
     db: sqlite3.Connection, multi_agent_connection: WhatsAppConnection
 ) -> None:
-    """Multi-agent group dispatches to each agent sequentially."""
+    """Multi-agent group dispatches to each agent."""
     chat_jid = "group-multi@g.us"
     _seed_messages(db, chat_jid)
 
@@ -407,6 +429,33 @@ async def test_multi_agent_dispatches_to_both(
     assert "wa-tyko" in prefixes
 
 
+@pytest.mark.asyncio
+async def test_multi_agent_dispatches_concurrently(
+    db: sqlite3.Connection, multi_agent_connection: WhatsAppConnection
+) -> None:
+    """Agents in a multi-agent group run at the same time, sharing one typing state."""
+    chat_jid = "group-multi@g.us"
+    _seed_messages(db, chat_jid)
+    started = 0
+    both_started = asyncio.Event()
+
+    async def dispatch(**kwargs: object) -> DispatchResult:
+        nonlocal started
+        started += 1
+        if started == 2:
+            both_started.set()
+        await asyncio.wait_for(both_started.wait(), timeout=1)
+        return _make_result("<reply>Hi</reply>")
+
+    presence = Mock()
+    multi_agent_connection._set_chat_presence = presence
+    with patch(MOCK_TARGET, dispatch):
+        await multi_agent_connection._handle_agent_trigger(chat_jid)
+
+    assert started == 2
+    assert [c.kwargs["composing"] for c in presence.call_args_list] == [True, False]
+
+
 @pytest.mark.asyncio
 async def test_multi_agent_message_prefixed(
     db: sqlite3.Connection, multi_agent_connection: WhatsAppConnection
@@ -673,9 +722,6 @@ def test_delivery_polls_agent_dbs(
     db: sqlite3.Connection, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
 ) -> None:
     """Delivery polling finds pending items in per-agent DBs, not just bridge DB."""
-    from pykoclaw_whatsapp.config import WhatsAppSettings
-    from pykoclaw_whatsapp.routing import AgentConfig, RoutingConfig
-
     monkeypatch.chdir(tmp_path)
 
     ressu_dir = tmp_path / "ressu-data"
@@ -726,3 +772,128 @@ def test_delivery_polls_agent_dbs(
         "SELECT status FROM delivery_queue WHERE id = 'd1'"
     ).fetchone()
     assert row["status"] == "delivered"
+
+
+def test_build_jid_is_cached() -> None:
+    """Repeated JID builds for the same chat return the same object."""
+    first = WhatsAppConnection._build_jid("123@g.us")
+
+    assert WhatsAppConnection._build_jid("123@g.us") is first
+    assert first.User == "123"
+    assert first.Server == "g.us"
+
+
+def test_close_agent_dbs_closes_and_forgets(connection: WhatsAppConnection) -> None:
+    """Per-agent DBs are closed and dropped from the cache on shutdown."""
+    agent_db = Mock()
+    connection._agent_dbs["Ressu"] = agent_db
+
+    connection.close_agent_dbs()
+
+    agent_db.close.assert_called_once()
+    assert connection._agent_dbs == {}
+
+
+@pytest.mark.asyncio
+async def test_shutdown_stops_polling_before_closing_dbs(
+    connection: WhatsAppConnection, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Shutdown cancels the delivery poller so it cannot reopen agent DBs."""
+    monkeypatch.setattr(connection, "_process_pending_deliveries", Mock())
+    task = asyncio.create_task(connection._delivery_poll_loop())
+    connection._delivery_task = task
+    agent_db = Mock()
+    connection._agent_dbs["Ressu"] = agent_db
+    await asyncio.sleep(0)
+
+    await connection._shutdown()
+
+    assert task.done()
+    assert connection._delivery_task is None
+    agent_db.close.assert_called_once()
+    assert connection._agent_dbs == {}
+
+
+def test_ensure_runtime_is_idempotent(connection: WhatsAppConnection) -> None:
+    """A second ``run()`` reuses the existing accumulator and handler."""
+    connection._ensure_runtime()
+    accumulator, handler = connection._batch_accumulator, connection._handler
+
+    connection._ensure_runtime()
+
+    assert accumulator is not None
+    assert connection._batch_accumulator is accumulator
+    assert connection._handler is handler
+
+
+@pytest.mark.asyncio
+async def test_delivery_wakeup_skips_poll_interval(
+    connection: WhatsAppConnection, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Setting the wake-up event processes deliveries before the interval."""
+    processed = asyncio.Event()
+    monkeypatch.setattr(connection, "_process_pending_deliveries", processed.set)
+
+    task = asyncio.create_task(connection._delivery_poll_loop())
+    connection._delivery_wakeup.set()
+    try:
+        await asyncio.wait_for(processed.wait(), timeout=1)
+    finally:
+        task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_delivery_poll_backs_off_while_idle(
+    connection: WhatsAppConnection, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Empty polls double the interval up to the cap; work or a wake-up resets it."""
+    # (woken, deliveries processed) for each poll, in order.
+    polls = iter(
+        [
+            (False, 0),
+            (False, 0),
+            (False, 0),
+            (False, 0),
+            (False, 1),
+            (False, 0),
+            (True, 0),
+        ]
+    )
+    timeouts: list[float] = []
+    processed = 0
+
+    async def fake_wait_for(aw: Any, timeout: float) -> None:
+        nonlocal processed
+        aw.close()
+        timeouts.append(timeout)
+        try:
+            woken, processed = next(polls)
+        except StopIteration:
+            raise asyncio.CancelledError from None
+        if not woken:
+            raise TimeoutError
+
+    monkeypatch.setattr(asyncio, "wait_for", fake_wait_for)
+    monkeypatch.setattr(connection, "_process_pending_deliveries", lambda: processed)
+
+    await connection._delivery_poll_loop()
+
+    assert timeouts == [10, 20, 40, 60, 60, 10, 20, 10]
+
+
+def test_delivery_db_list_is_cached(connection: WhatsAppConnection) -> None:
+    """The delivery DB list is reused until agent DBs are closed."""
+    dbs = connection._get_all_delivery_dbs()
+    assert connection._get_all_delivery_dbs() is dbs
+
+    connection.close_agent_dbs()
+    assert connection._get_all_delivery_dbs() is not dbs
+
+
+def test_chat_presence_debounces_repeated_state(connection: WhatsAppConnection) -> None:
+    """Repeating the same presence state within the debounce window is skipped."""
+    connection._set_chat_presence("123@g.us", composing=True)
+    connection._set_chat_presence("123@g.us", composing=True)
+    connection._set_chat_presence("123@g.us", composing=False)
+
+    assert connection._client.send_chat_presence.call_count == 2
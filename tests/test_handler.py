@@ -12,6 +12,8 @@ import pytest
 
 pytest.importorskip("neonize")
 
+from neonize.utils.jid import build_jid
+
 from pykoclaw_whatsapp.handler import (
     BatchAccumulator,
     MessageHandler,
@@ -197,6 +199,24 @@ def test_get_new_messages_for_chat(db: sqlite3.Connection) -> None:
     assert messages[1][2] == "Message 3"
 
 
+def test_get_new_messages_uses_index() -> None:
+    """The plugin migrations let the new-messages query seek by index."""
+    from pykoclaw_whatsapp import WhatsAppPlugin
+    from pykoclaw_whatsapp.handler import _NEW_MESSAGES_SQL
+
+    db = sqlite3.connect(":memory:")
+    for sql in WhatsAppPlugin().get_db_migrations():
+        db.execute(sql)
+
+    plan = " ".join(
+        row[3]
+        for row in db.execute(f"EXPLAIN QUERY PLAN {_NEW_MESSAGES_SQL}", ("", ""))
+    )
+    assert "USING INDEX ix_wa_messages_chat_ts" in plan
+    assert "USING INDEX ix_wa_attachments_chat_ts" in plan
+    assert "SCAN" not in plan
+
+
 def test_store_attachment(db: sqlite3.Connection) -> None:
     """Test that store_attachment inserts a row into wa_attachments."""
     store_attachment(
@@ -279,8 +299,6 @@ def _make_handler(
     self_jid: str | None = None,
     tmp_path: Path | None = None,
 ) -> tuple[MessageHandler, Mock]:
-    from pathlib import Path as _Path
-
     loop = Mock(spec=asyncio.AbstractEventLoop)
     loop.call_later = Mock(return_value=Mock())
 
@@ -294,7 +312,7 @@ def _make_handler(
         trigger_names=trigger_names or [trigger_name],
         loop=loop,
         batch_accumulator=batch_acc,
-        data_dir=tmp_path or _Path("/tmp/pykoclaw-test"),
+        data_dir=tmp_path or Path("/tmp/pykoclaw-test"),
     )
     if self_jid:
         handler.set_self_jid(self_jid)
@@ -310,11 +328,9 @@ def _make_message_event(
     is_group: bool = False,
     timestamp_ms: int = 1704067200000,
 ) -> Mock:
-    from neonize.utils.jid import build_jid
-
     mock_event = Mock()
 
-    user_part, server_part = chat_jid.split("@", 1)
+    user_part, _, server_part = chat_jid.partition("@")
     chat_jid_obj = build_jid(user_part, server_part)
 
     sender_user = sender.replace(" ", "")
@@ -344,6 +360,37 @@ def test_non_mention_enters_batch(db: sqlite3.Connection) -> None:
     batch_acc.flush_now.assert_not_called()
 
 
+def test_on_message_commits_each_write(db: sqlite3.Connection) -> None:
+    """Each write is committed on its own on the shared bridge connection."""
+    tracked = Mock(wraps=db)
+    handler, _ = _make_handler(tracked)
+
+    handler.on_message(Mock(), _make_message_event("123@s.whatsapp.net", "Hello"))
+
+    # Message, chat timestamp and global cursor.
+    assert tracked.commit.call_count == 3
+    row = db.execute("SELECT text FROM wa_messages").fetchone()
+    assert row["text"] == "Hello"
+
+
+def test_on_message_error_leaves_no_open_transaction(
+    db: sqlite3.Connection, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A failure mid-message keeps the committed writes and no open transaction."""
+    handler, batch_acc = _make_handler(db)
+    monkeypatch.setattr(
+        "pykoclaw_whatsapp.handler.update_global_cursor",
+        Mock(side_effect=sqlite3.OperationalError("boom")),
+    )
+
+    handler.on_message(Mock(), _make_message_event("123@s.whatsapp.net", "Hello"))
+
+    assert not db.in_transaction
+    assert db.execute("SELECT COUNT(*) FROM wa_messages").fetchone()[0] == 1
+    assert db.execute("SELECT COUNT(*) FROM wa_chats").fetchone()[0] == 1
+    batch_acc.add.assert_not_called()
+
+
 def test_hard_mention_flushes(db: sqlite3.Connection) -> None:
     handler, batch_acc = _make_handler(db)
     client = Mock()
@@ -352,6 +399,7 @@ def test_hard_mention_flushes(db: sqlite3.Connection) -> None:
     handler.on_message(client, event)
 
     batch_acc.add.assert_not_called()
+    batch_acc.flush_soon.assert_called_once_with("123@s.whatsapp.net")
 
 
 def test_hard_mention_case_insensitive(db: sqlite3.Connection) -> None:
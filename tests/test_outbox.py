@@ -0,0 +1,79 @@
+"""Tests for the debounced assistant message outbox."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from pykoclaw_whatsapp.outbox import MessageOutbox
+
+
+@pytest.fixture
+def db() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE wa_messages (chat_jid TEXT, sender TEXT, text TEXT,"
+        " timestamp TEXT, is_from_me INTEGER)"
+    )
+    return conn
+
+
+@pytest.mark.asyncio
+async def test_put_batches_rows_until_flush(db: sqlite3.Connection) -> None:
+    """Test that queued rows are written together after the debounce delay."""
+    outbox = MessageOutbox(db, delay=0.01)
+
+    outbox.put("123@s.whatsapp.net", "one")
+    outbox.put("123@s.whatsapp.net", "two")
+    assert db.execute("SELECT COUNT(*) FROM wa_messages").fetchone() == (0,)
+
+    await asyncio.sleep(0.05)
+
+    rows = db.execute("SELECT text, sender, is_from_me FROM wa_messages").fetchall()
+    assert rows == [("one", "assistant", 1), ("two", "assistant", 1)]
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_immediately(db: sqlite3.Connection) -> None:
+    """Test that an explicit flush writes pending rows and cancels the timer."""
+    outbox = MessageOutbox(db, delay=60)
+
+    outbox.put("123@s.whatsapp.net", "hello")
+    outbox.flush()
+
+    assert db.execute("SELECT text FROM wa_messages").fetchall() == [("hello",)]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_rows_and_retries() -> None:
+    """Test that rows survive a failed write and are retried after the delay."""
+    db = sqlite3.connect(":memory:")
+    outbox = MessageOutbox(db, delay=0.01)
+
+    outbox.put("123@s.whatsapp.net", "hello")
+    outbox.flush()  # no wa_messages table yet
+
+    db.execute(
+        "CREATE TABLE wa_messages (chat_jid TEXT, sender TEXT, text TEXT,"
+        " timestamp TEXT, is_from_me INTEGER)"
+    )
+    await asyncio.sleep(0.05)
+
+    assert db.execute("SELECT text FROM wa_messages").fetchall() == [("hello",)]
+
+
+def test_put_rearms_timer_on_new_loop(db: sqlite3.Connection) -> None:
+    """Test that a timer left on a closed loop does not block later flushes."""
+    outbox = MessageOutbox(db, delay=0.01)
+
+    async def put(text: str, wait: float) -> None:
+        outbox.put("123@s.whatsapp.net", text)
+        await asyncio.sleep(wait)
+
+    asyncio.run(put("one", 0))  # loop closes before the timer fires
+    asyncio.run(put("two", 0.05))
+
+    rows = db.execute("SELECT text FROM wa_messages").fetchall()
+    assert rows == [("one",), ("two",)]
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from unittest.mock import Mock
+from unittest.mock import MagicMock, Mock
 
 import pytest
 
@@ -160,3 +160,49 @@ def test_len_returns_queue_size() -> None:
 
     queue.enqueue(mock_jid, "Message 2")
     assert len(queue) == 2
+
+
+def test_send_many_sends_each_item() -> None:
+    """Test that send_many sends every item in order."""
+    queue = OutgoingQueue()
+    queue.connected = True
+
+    mock_jid1 = Mock()
+    mock_jid2 = Mock()
+    mock_client = Mock()
+    queue.send_many(mock_client, [(mock_jid1, "One"), (mock_jid2, "Two")])
+
+    assert mock_client.send_message.call_args_list == [
+        ((mock_jid1, "One"),),
+        ((mock_jid2, "Two"),),
+    ]
+    assert len(queue) == 0
+
+
+def test_send_many_takes_lock_once() -> None:
+    """Test that send_many acquires the queue lock once for the whole batch."""
+    queue = OutgoingQueue()
+    queue.connected = True
+    lock = MagicMock()
+    queue._lock = lock
+
+    queue.send_many(Mock(), [(Mock(), "One"), (Mock(), "Two"), (Mock(), "Three")])
+
+    lock.__enter__.assert_called_once()
+
+
+def test_flush_requeues_failures_without_retrying() -> None:
+    """Test that a message failing during flush is kept for the next flush."""
+    queue = OutgoingQueue()
+    queue.connected = True
+
+    mock_jid = Mock()
+    mock_jid.User = "123"
+    queue.enqueue(mock_jid, "Message")
+
+    mock_client = Mock()
+    mock_client.send_message.side_effect = Exception("Send failed")
+    queue.flush(mock_client)
+
+    mock_client.send_message.assert_called_once()
+    assert len(queue) == 1
@@ -57,6 +57,18 @@ def test_agents_for_chat_multi_route() -> None:
     assert agents[1].name == "Tyko"
 
 
+def test_routing_lookups_are_precomputed() -> None:
+    """Repeated lookups return the same tuples instead of rebuilding lists."""
+    cfg = _make_config()
+    assert cfg.agents_for_chat("group-multi@g.us") is cfg.agents_for_chat(
+        "group-multi@g.us"
+    )
+    assert cfg.agents_for_chat("dm-1@s.whatsapp.net") is cfg.agents_for_chat(
+        "dm-2@s.whatsapp.net"
+    )
+    assert cfg.all_trigger_names is cfg.all_trigger_names
+
+
 def test_is_multi_agent() -> None:
     cfg = _make_config()
     assert not cfg.is_multi_agent("unknown@s.whatsapp.net")
@@ -95,6 +107,15 @@ def test_parse_conversation() -> None:
     assert jid == "456@s.whatsapp.net"
 
 
+def test_parse_conversation_hyphenated_jid() -> None:
+    """Only the agent prefix is stripped; hyphens in the JID are kept."""
+    cfg = _make_config()
+    agent, jid = cfg.parse_conversation("wa-ressu-123-456@g.us")
+    assert agent is not None
+    assert agent.name == "Ressu"
+    assert jid == "123-456@g.us"
+
+
 def test_parse_conversation_unknown() -> None:
     cfg = _make_config()
     agent, jid = cfg.parse_conversation("wa-unknown-123@g.us")
@@ -196,3 +217,33 @@ def test_find_hard_mentions_multi_agent() -> None:
 
     mentioned = find_hard_mentions("Hello everyone", ["Ressu", "Tyko"])
     assert mentioned == set()
+
+
+def test_find_hard_mentions_prefix_names_fall_back() -> None:
+    """Names that prefix each other are still matched independently."""
+    __import__("pytest").importorskip("neonize")
+    from pykoclaw_whatsapp.handler import find_hard_mentions
+
+    mentioned = find_hard_mentions("@Andy Bot, hi", ["Andy", "Andy Bot"])
+    assert mentioned == {"Andy", "Andy Bot"}
+
+    mentioned = find_hard_mentions("andy, hi", ["Andy", "ANDY"])
+    assert mentioned == {"Andy", "ANDY"}
+
+
+def test_find_hard_mentions_unicode_case_folding() -> None:
+    """Names matched via IGNORECASE folding still resolve to the trigger name."""
+    __import__("pytest").importorskip("neonize")
+    from pykoclaw_whatsapp.handler import find_hard_mentions
+
+    assert find_hard_mentions("@İris hi", ["Iris", "Tyko"]) == {"Iris"}
+    assert find_hard_mentions("@ſam hi", ["Sam", "Tyko"]) == {"Sam"}
+
+
+def test_find_hard_mentions_overlapping_names_fall_back() -> None:
+    """A name that contains another after ". " still yields both names."""
+    __import__("pytest").importorskip("neonize")
+    from pykoclaw_whatsapp.handler import find_hard_mentions
+
+    mentioned = find_hard_mentions("Dr. Andy, hi", ["Dr. Andy", "Andy"])
+    assert mentioned == {"Dr. Andy", "Andy"}
@@ -0,0 +1,52 @@
+"""Tests for SQLite pragma and locking helpers."""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from pykoclaw_whatsapp.sqlite_tuning import (
+    tune_bridge_db,
+    tune_session_db,
+    write_lock,
+)
+
+
+def test_tune_session_db_enables_wal(tmp_path: Path) -> None:
+    """Test that the session DB is switched to WAL journal mode."""
+    path = tmp_path / "whatsapp" / "session.db"
+
+    tune_session_db(path)
+
+    conn = sqlite3.connect(str(path))
+    try:
+        (mode,) = conn.execute("PRAGMA journal_mode").fetchone()
+    finally:
+        conn.close()
+    assert mode == "wal"
+
+
+def test_tune_bridge_db_sets_pragmas(tmp_path: Path) -> None:
+    """Test that the bridge DB gets WAL, synchronous and cache pragmas."""
+    conn = sqlite3.connect(str(tmp_path / "pykoclaw.db"))
+    try:
+        tune_bridge_db(conn)
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        assert conn.execute("PRAGMA synchronous").fetchone() == (1,)
+        assert conn.execute("PRAGMA cache_size").fetchone() == (-65536,)
+        assert conn.execute("PRAGMA temp_store").fetchone() == (2,)
+    finally:
+        conn.close()
+
+
+def test_write_lock_is_shared_per_connection() -> None:
+    """Test that each connection gets one reentrant write lock."""
+    first = sqlite3.connect(":memory:")
+    second = sqlite3.connect(":memory:")
+
+    lock = write_lock(first)
+
+    assert write_lock(first) is lock
+    assert write_lock(second) is not lock
+    with lock, write_lock(first):
+        pass
@@ -0,0 +1,20 @@
+"""Tests for the import-time profiling helper."""
+
+from __future__ import annotations
+
+from pykoclaw_whatsapp._startup_profile import ImportTiming, parse_importtime
+
+
+def test_parse_importtime_skips_header_and_other_lines() -> None:
+    """Test that only timing rows are parsed and module names are stripped."""
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   _io\n"
+        "some unrelated warning\n"
+        "import time:      3500 |       9000 | click\n"
+    )
+
+    assert parse_importtime(stderr) == [
+        ImportTiming(self_us=120, cumulative_us=120, module="_io"),
+        ImportTiming(self_us=3500, cumulative_us=9000, module="click"),
+    ]
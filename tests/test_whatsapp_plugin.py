@@ -3,10 +3,13 @@
 from __future__ import annotations
 
 import sqlite3
+from collections import OrderedDict
 from pathlib import Path
+from unittest.mock import Mock
 
 import click
 import pytest
+from pykoclaw.plugins import PykoClawPlugin
 
 from pykoclaw_whatsapp import WhatsAppPlugin
 from pykoclaw_whatsapp.config import WhatsAppSettings
@@ -14,8 +17,6 @@ from pykoclaw_whatsapp.config import WhatsAppSettings
 
 def test_whatsapp_plugin_implements_protocol() -> None:
     """Test that WhatsAppPlugin implements PykoClawPlugin protocol."""
-    from pykoclaw.plugins import PykoClawPlugin
-
     plugin = WhatsAppPlugin()
     assert isinstance(plugin, PykoClawPlugin)
 
@@ -32,17 +33,43 @@ def test_register_commands_adds_whatsapp_group() -> None:
     assert isinstance(whatsapp_group, click.Group)
 
 
-def test_whatsapp_group_has_subcommands() -> None:
-    """Test that whatsapp group has auth, run, and status subcommands."""
+@pytest.mark.parametrize("name", ["auth", "run", "status"])
+def test_whatsapp_group_has_subcommands(name: str) -> None:
+    """Test that whatsapp group lists the auth, run, and status subcommands."""
+    plugin = WhatsAppPlugin()
+    group = click.Group()
+
+    plugin.register_commands(group)
+
+    whatsapp_group = group.commands["whatsapp"]
+    ctx = click.Context(whatsapp_group)
+    assert name in whatsapp_group.list_commands(ctx)
+
+
+def test_whatsapp_subcommands_resolve_lazily() -> None:
+    """Test that lazy subcommands resolve to click commands on demand."""
     plugin = WhatsAppPlugin()
     group = click.Group()
 
     plugin.register_commands(group)
 
     whatsapp_group = group.commands["whatsapp"]
-    assert "auth" in whatsapp_group.commands
-    assert "run" in whatsapp_group.commands
-    assert "status" in whatsapp_group.commands
+    ctx = click.Context(whatsapp_group)
+    for name in ("auth", "run", "status"):
+        command = whatsapp_group.get_command(ctx, name)
+        assert isinstance(command, click.Command)
+        assert command.name == name
+    assert whatsapp_group.get_command(ctx, "nonexistent") is None
+
+
+@pytest.mark.parametrize(
+    "index, table", [(0, "wa_messages"), (1, "wa_chats"), (2, "wa_config")]
+)
+def test_migration_creates_table(index: int, table: str) -> None:
+    """Test that each base migration creates its table."""
+    migrations = WhatsAppPlugin().get_db_migrations()
+
+    assert f"CREATE TABLE IF NOT EXISTS {table}" in migrations[index]
 
 
 def test_get_db_migrations_returns_valid_sql() -> None:
@@ -50,10 +77,7 @@ def test_get_db_migrations_returns_valid_sql() -> None:
     plugin = WhatsAppPlugin()
     migrations = plugin.get_db_migrations()
 
-    assert len(migrations) == 4
-    assert "CREATE TABLE IF NOT EXISTS wa_messages" in migrations[0]
-    assert "CREATE TABLE IF NOT EXISTS wa_chats" in migrations[1]
-    assert "CREATE TABLE IF NOT EXISTS wa_config" in migrations[2]
+    assert len(migrations) == 6
 
     db = sqlite3.connect(":memory:")
     for sql in migrations:
@@ -67,6 +91,12 @@ def test_get_db_migrations_returns_valid_sql() -> None:
     assert "wa_chats" in tables
     assert "wa_config" in tables
 
+    indexes = {
+        row[0]
+        for row in db.execute("SELECT name FROM sqlite_master WHERE type='index'")
+    }
+    assert {"ix_wa_messages_chat_ts", "ix_wa_attachments_chat_ts"} <= indexes
+
 
 def test_get_config_class_returns_whatsapp_settings() -> None:
     """Test that get_config_class returns WhatsAppSettings."""
@@ -99,5 +129,105 @@ def test_whatsapp_settings_defaults(
     settings = WhatsAppSettings()
 
     assert settings.trigger_name == "Andy"
-    assert "whatsapp" in str(settings.auth_dir)
-    assert "session.db" in str(settings.session_db)
+    assert "whatsapp" in settings.auth_dir.parts
+    assert settings.session_db.name == "session.db"
+
+
+@pytest.mark.asyncio
+async def test_send_message_queues_through_outbox(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that send_message acknowledges at once and flush_outboxes writes."""
+    import pykoclaw_whatsapp
+
+    monkeypatch.setattr(pykoclaw_whatsapp, "_OUTBOXES", {})
+    db = sqlite3.connect(":memory:")
+    for sql in WhatsAppPlugin().get_db_migrations():
+        db.executescript(sql)
+
+    result = await pykoclaw_whatsapp._send_message(
+        db, {"chat_jid": "123@s.whatsapp.net", "text": "hello"}
+    )
+
+    assert result["content"][0]["text"].startswith("Message queued")
+    assert db.execute("SELECT COUNT(*) FROM wa_messages").fetchone() == (0,)
+
+    pykoclaw_whatsapp.flush_outboxes()
+
+    rows = db.execute("SELECT sender, text, is_from_me FROM wa_messages").fetchall()
+    assert rows == [("assistant", "hello", 1)]
+
+
+@pytest.mark.asyncio
+async def test_get_chat_history_reuses_xml_until_new_message(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that repeated polls reuse the XML and a new message invalidates it."""
+    pytest.importorskip("neonize")
+    import pykoclaw_whatsapp
+    from pykoclaw_whatsapp import handler
+
+    monkeypatch.setattr(pykoclaw_whatsapp, "_HISTORY_XML", OrderedDict())
+    format_spy = Mock(wraps=handler.format_xml_messages)
+    monkeypatch.setattr(handler, "format_xml_messages", format_spy)
+    db = sqlite3.connect(":memory:")
+    for sql in WhatsAppPlugin().get_db_migrations():
+        db.executescript(sql)
+    chat = {"chat_jid": "123@s.whatsapp.net"}
+    handler.store_message(
+        db, "123@s.whatsapp.net", "Alice", "one", "2024-01-01T00:00:01", False
+    )
+
+    first = await pykoclaw_whatsapp._get_chat_history(db, chat)
+    second = await pykoclaw_whatsapp._get_chat_history(db, chat)
+
+    assert second == first
+    assert format_spy.call_count == 1
+
+    handler.store_message(
+        db, "123@s.whatsapp.net", "Alice", "two", "2024-01-01T00:00:02", False
+    )
+    third = await pykoclaw_whatsapp._get_chat_history(db, chat)
+
+    assert format_spy.call_count == 2
+    assert "two" in third["content"][0]["text"]
+    assert len(pykoclaw_whatsapp._HISTORY_XML) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_chat_history_cache_is_bounded(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that the history cache evicts its least recently used chat."""
+    pytest.importorskip("neonize")
+    import pykoclaw_whatsapp
+    from pykoclaw_whatsapp import handler
+
+    monkeypatch.setattr(pykoclaw_whatsapp, "_HISTORY_XML", OrderedDict())
+    monkeypatch.setattr(pykoclaw_whatsapp, "_HISTORY_XML_MAX", 2)
+    db = sqlite3.connect(":memory:")
+    for sql in WhatsAppPlugin().get_db_migrations():
+        db.executescript(sql)
+    for n in range(3):
+        chat_jid = f"{n}@s.whatsapp.net"
+        handler.store_message(db, chat_jid, "Alice", "hi", "2024-01-01", False)
+        await pykoclaw_whatsapp._get_chat_history(db, {"chat_jid": chat_jid})
+
+    assert [chat for _, chat in pykoclaw_whatsapp._HISTORY_XML] == [
+        "1@s.whatsapp.net",
+        "2@s.whatsapp.net",
+    ]
+
+
+def test_get_mcp_servers_is_cached_per_conversation() -> None:
+    """Test that get_mcp_servers reuses servers for the same db and conversation."""
+    pytest.importorskip("neonize")
+    pytest.importorskip("claude_agent_sdk")
+
+    plugin = WhatsAppPlugin()
+    db = sqlite3.connect(":memory:")
+
+    servers = plugin.get_mcp_servers(db, "cached")
+
+    assert plugin.get_mcp_servers(db, "cached") is servers
+    assert plugin.get_mcp_servers(db, "other") is not servers